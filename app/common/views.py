@@ -2,10 +2,12 @@ import hashlib
 import hmac
 import subprocess
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Security
 from fastapi import Request, Header
 
+from app.system.views.auth import get_current_active_user
 from cores.config import settings
+from cores.metrics import collect_metrics
 from cores.response import ResponseModel
 
 common_router = APIRouter()
@@ -20,6 +22,19 @@ async def healthy():
     return ResponseModel()
 
 
+@common_router.get(
+    "/metrics",
+    summary="metrics",
+    response_model=ResponseModel[dict],
+    dependencies=[Security(get_current_active_user, scopes=["system:metrics:read"])],
+)
+async def metrics():
+    """
+    进程内的运行指标（线程池、缓存命中率等），需要 system:metrics:read 权限
+    """
+    return ResponseModel(data=collect_metrics())
+
+
 @common_router.post("/github-webhook")
 async def github_webhook(request: Request, x_hub_signature_256: str = Header(None)):
     """
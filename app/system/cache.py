@@ -0,0 +1,203 @@
+import json
+from typing import Dict, List, Optional, Tuple
+
+from ghkit.cache.redis_cache import AsyncRedisCache
+from redis.exceptions import RedisError
+
+from app.system.models import User
+from app.system.serializers.users import UserSnapshot
+from cores.cache import LRUCache
+from cores.log import LOG
+from cores.metrics import register_metrics
+from cores.redis import ASYNC_REDIS
+from cores.scope import filter_scopes
+
+# 用户快照缓存：进程内 L1 + Redis L2
+# L1 无法跨进程失效，所以只保留很短的时间
+USER_SNAPSHOT_LOCAL_TTL = 5
+USER_SNAPSHOT_REDIS_TTL = 300
+
+user_snapshot_local = LRUCache(maxsize=10000, ttl=USER_SNAPSHOT_LOCAL_TTL)
+user_snapshot_redis = AsyncRedisCache(ASYNC_REDIS, prefix="system:user_snapshot")
+register_metrics("user_snapshot_cache", user_snapshot_local.stats)
+
+# 用户的有效权限（已经过 filter_scopes 过滤），在角色、权限变更时主动重建
+USER_PERMISSIONS_REDIS_TTL = 7 * 24 * 3600
+
+user_permissions_redis = AsyncRedisCache(ASYNC_REDIS, prefix="system:user_permissions")
+
+# 权限版本号，写入 token，用于判断 token 中的 scopes 是否已过期
+# 用户版本号在该用户的有效权限重建时递增，全局版本号在权限本身变更时递增
+PERMISSION_VERSION_LOCAL_TTL = 2
+GLOBAL_PERMISSION_VERSION_KEY = "system:permission_version:global"
+
+permission_version_local = LRUCache(maxsize=10000, ttl=PERMISSION_VERSION_LOCAL_TTL)
+permission_version_redis = AsyncRedisCache(ASYNC_REDIS, prefix="system:permission_version:user")
+register_metrics("permission_version_cache", permission_version_local.stats)
+
+
+async def get_user_snapshot(username: str) -> Optional[UserSnapshot]:
+    """
+    获取用户快照，依次查询 L1、L2、数据库
+    """
+    if (snapshot := user_snapshot_local.get(username)) is not None:
+        return snapshot
+
+    try:
+        cached = await user_snapshot_redis.get(username)
+    except RedisError as e:
+        LOG.exception(e)
+        cached = None
+
+    if cached:
+        snapshot = UserSnapshot.model_validate_json(cached)
+    else:
+        user = await User.get_queryset().get_or_none(username=username)
+        if user is None:
+            return None
+        snapshot = UserSnapshot.model_validate(user)
+        try:
+            await user_snapshot_redis.set(
+                username, snapshot.model_dump_json(), ttl=USER_SNAPSHOT_REDIS_TTL
+            )
+        except RedisError as e:
+            LOG.exception(e)
+
+    user_snapshot_local.set(username, snapshot)
+    return snapshot
+
+
+async def invalidate_user_snapshot(*usernames: str):
+    """
+    用户信息变更后使快照失效
+    """
+    for username in usernames:
+        user_snapshot_local.delete(username)
+        try:
+            await user_snapshot_redis.delete(username)
+        except RedisError as e:
+            LOG.exception(e)
+
+
+async def rebuild_user_permissions(
+    *user_ids: int, bump_version: bool = True
+) -> Dict[int, List[str]]:
+    """
+    从数据库重新计算指定用户的有效权限并写入缓存
+    :param bump_version: 是否递增用户的权限版本号，使已签发 token 中的 scopes 失效
+    """
+    if not user_ids:
+        return {}
+
+    users = await (
+        User.get_queryset().filter(id__in=user_ids).prefetch_related("roles__permissions")
+    )
+    # 预加载不会经过 get_queryset，这里排除已逻辑删除的角色和权限
+    user_permissions = {
+        user.id: filter_scopes(
+            {
+                permission.name
+                for role in user.roles
+                if role.deleted_at is None
+                for permission in role.permissions
+                if permission.deleted_at is None
+            }
+        )
+        for user in users
+    }
+    removed_user_ids = set(user_ids) - user_permissions.keys()
+
+    try:
+        async with ASYNC_REDIS.pipeline(transaction=False) as pipe:
+            for user_id, permissions in user_permissions.items():
+                pipe.set(
+                    user_permissions_redis.key_name(user_id),
+                    json.dumps(permissions),
+                    ex=USER_PERMISSIONS_REDIS_TTL,
+                )
+            for user_id in removed_user_ids:
+                pipe.delete(user_permissions_redis.key_name(user_id))
+            if bump_version:
+                for user_id in user_ids:
+                    pipe.incr(permission_version_redis.key_name(user_id))
+            await pipe.execute()
+    except RedisError as e:
+        LOG.exception(e)
+
+    if bump_version:
+        for user_id in user_ids:
+            permission_version_local.delete(user_id)
+
+    return user_permissions
+
+
+async def rebuild_role_users_permissions(*role_ids: int):
+    """
+    角色的权限变更后，重建拥有这些角色的用户的有效权限
+    """
+    user_ids = (
+        await User.get_queryset()
+        .filter(roles__id__in=role_ids)
+        .distinct()
+        .values_list("id", flat=True)
+    )
+    await rebuild_user_permissions(*user_ids)
+
+
+async def rebuild_permission_users_permissions(*permission_ids: int):
+    """
+    权限变更后，重建通过角色拥有这些权限的用户的有效权限
+    """
+    user_ids = (
+        await User.get_queryset()
+        .filter(roles__permissions__id__in=permission_ids)
+        .distinct()
+        .values_list("id", flat=True)
+    )
+    await rebuild_user_permissions(*user_ids)
+
+
+async def get_user_permissions(user_id: int) -> List[str]:
+    """
+    获取用户的有效权限，缓存未命中时重建
+    """
+    try:
+        cached = await user_permissions_redis.get(user_id)
+    except RedisError as e:
+        LOG.exception(e)
+        cached = None
+
+    if cached is not None:
+        return json.loads(cached)
+    return (await rebuild_user_permissions(user_id, bump_version=False)).get(user_id, [])
+
+
+async def get_permission_versions(user_id: int) -> Optional[Tuple[int, int]]:
+    """
+    获取 (全局版本号, 用户版本号)，Redis 不可用时返回 None
+    """
+    if (versions := permission_version_local.get(user_id)) is not None:
+        return versions
+
+    try:
+        global_version, user_version = await ASYNC_REDIS.mget(
+            GLOBAL_PERMISSION_VERSION_KEY, permission_version_redis.key_name(user_id)
+        )
+    except RedisError as e:
+        LOG.exception(e)
+        return None
+
+    versions = (int(global_version or 0), int(user_version or 0))
+    permission_version_local.set(user_id, versions)
+    return versions
+
+
+async def bump_global_permission_version():
+    """
+    权限本身变更后递增全局版本号，所有已签发 token 中的 scopes 都会被视为过期
+    """
+    try:
+        await ASYNC_REDIS.incr(GLOBAL_PERMISSION_VERSION_KEY)
+    except RedisError as e:
+        LOG.exception(e)
+    permission_version_local.clear()
@@ -5,10 +5,13 @@ from tortoise.expressions import Q
 from tortoise.queryset import QuerySet
 
 from app.system.models import Menu, Permission, Role, User
-from cores.filter import FilterSet
+from cores.filter import FilterSet, SearchMode
 
 
 class ListPermissionFilterSet(FilterSet):
+    # 权限名形如 system:user:read，按前缀匹配
+    search_modes = {"name": SearchMode.PREFIX, "description": SearchMode.FULLTEXT}
+
     name: Optional[str] = Field(None, description="name")
     description: Optional[str] = Field(None, description="description")
 
@@ -16,26 +19,30 @@ class ListPermissionFilterSet(FilterSet):
         if not query:
             query = Permission.get_queryset().all()
         if self.name:
-            query = query.filter(Q(name__icontains=self.name))
+            query = self.search(query, "name", self.name)
         if self.description:
-            query = query.filter(Q(description__icontains=self.description))
+            query = self.search(query, "description", self.description)
         return query
 
 
 class ListRoleFilterSet(ListPermissionFilterSet):
+    search_modes = {"name": SearchMode.FULLTEXT, "description": SearchMode.FULLTEXT}
+
     def apply_filters(self, query: QuerySet[Role] = None) -> QuerySet[Role]:
         if not query:
             query = Role.get_queryset().all()
         if self.name:
-            query = query.filter(Q(name__icontains=self.name))
+            query = self.search(query, "name", self.name)
         if self.description:
-            query = query.filter(Q(description__icontains=self.description))
+            query = self.search(query, "description", self.description)
         return query
 
     #
 
 
 class ListUserFilterSet(FilterSet):
+    search_modes = {"username": SearchMode.PREFIX, "email": SearchMode.PREFIX}
+
     username: Optional[str] = Field(None, description="按用户名过滤")
     email: Optional[str] = Field(None, description="按电子邮件过滤")
     is_active: Optional[bool] = Field(None, description="按是否激活状态过滤")
@@ -45,9 +52,9 @@ class ListUserFilterSet(FilterSet):
         if not query:
             query = User.get_queryset().all()
         if self.username:
-            query = query.filter(Q(username__icontains=self.username))
+            query = self.search(query, "username", self.username)
         if self.email:
-            query = query.filter(Q(email__icontains=self.email))
+            query = self.search(query, "email", self.email)
         if self.is_active is not None:
             query = query.filter(Q(is_active=self.is_active))
         if self.is_superuser is not None:
@@ -56,6 +63,8 @@ class ListUserFilterSet(FilterSet):
 
 
 class ListMenuFilterSet(FilterSet):
+    search_modes = {"name": SearchMode.FULLTEXT, "path": SearchMode.PREFIX}
+
     name: Optional[str] = Field(None, description="按用户名过滤")
     path: Optional[str] = Field(None, description="按电子邮件过滤")
 
@@ -63,7 +72,7 @@ class ListMenuFilterSet(FilterSet):
         if not query:
             query = Menu.get_queryset().all()
         if self.name:
-            query = query.filter(Q(name__icontains=self.name))
+            query = self.search(query, "name", self.name)
         if self.path:
-            query = query.filter(Q(path__icontains=self.path))
+            query = self.search(query, "path", self.path)
         return query
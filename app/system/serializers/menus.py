@@ -72,7 +72,9 @@ class MenuDetailTree(MenuDetail2):
                     no_affix=menu.meta_no_affix,
                     ignore_cache=menu.meta_ignore_cache,
                 ),
-            ) for menu in menus]
+            )
+            for menu in menus
+        ]
 
         menu_dict = {menu.id: cls.model_validate(menu) for menu in menus}
         tree = []
@@ -109,3 +111,12 @@ MenuCreate = pydantic_model_creator(
 
 MenuUpdate = MenuCreate
 MenuPatch = MenuCreate
+
+
+# 批量更新的条目：id 必填，其余字段均可省略，只更新传入的字段
+MenuBulkPatch = pydantic_model_creator(
+    Menu,
+    name="MenuBulkPatch",
+    include=("id", *MenuPatch.model_fields),
+    optional=tuple(MenuPatch.model_fields),
+)
@@ -20,3 +20,12 @@ PermissionCreate = pydantic_model_creator(
 )
 PermissionUpdate = PermissionCreate
 PermissionPatch = PermissionCreate
+
+
+# 批量更新的条目：id 必填，其余字段均可省略，只更新传入的字段
+PermissionBulkPatch = pydantic_model_creator(
+    Permission,
+    name="PermissionBulkPatch",
+    include=("id", *PermissionPatch.model_fields),
+    optional=tuple(PermissionPatch.model_fields),
+)
@@ -18,3 +18,12 @@ RoleDetail = pydantic_model_creator(
 RoleCreate = pydantic_model_creator(Role, name="RoleCreate", include=("name", "description"))
 RoleUpdate = RoleCreate
 RolePatch = RoleCreate
+
+
+# 批量更新的条目：id 必填，其余字段均可省略，只更新传入的字段
+RoleBulkPatch = pydantic_model_creator(
+    Role,
+    name="RoleBulkPatch",
+    include=("id", *RolePatch.model_fields),
+    optional=tuple(RolePatch.model_fields),
+)
@@ -1,3 +1,4 @@
+from pydantic import BaseModel
 from tortoise.contrib.pydantic import pydantic_model_creator
 
 from app.system.models import User
@@ -27,3 +28,24 @@ UserPatch = pydantic_model_creator(
     name="UserPatch",
     include=("username", "email", "is_active"),
 )
+
+
+# 批量更新的条目：id 必填，其余字段均可省略，只更新传入的字段
+UserBulkPatch = pydantic_model_creator(
+    User,
+    name="UserBulkPatch",
+    include=("id", *UserPatch.model_fields),
+    optional=tuple(UserPatch.model_fields),
+)
+
+
+class UserSnapshot(BaseModel):
+    """鉴权所需的用户快照，用于缓存"""
+
+    id: int
+    username: str
+    is_active: bool
+    is_superuser: bool
+
+    class Config:
+        from_attributes = True
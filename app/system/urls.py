@@ -12,8 +12,9 @@ from app.system.views.users import user_router
 from app.system.views.users_me import user_me_router
 from app.system.views.users_permissions import user_permission_route
 from app.system.views.users_roles import user_role_route
+from cores.response import FastJSONResponse
 
-router = APIRouter()
+router = APIRouter(default_response_class=FastJSONResponse)
 router.include_router(auth_router, prefix="/auth", tags=["系统/授权"])
 router.include_router(user_me_router, prefix="/users", tags=["系统/用户/我"])
 router.include_router(user_role_route, prefix="/users", tags=["系统/用户/角色"])
@@ -1,70 +1,149 @@
-from typing import List, Union
+from dataclasses import dataclass
+from typing import List, Optional, Union
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, Security
 from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm, SecurityScopes
 from passlib.exc import InvalidTokenError
 from pydantic import BaseModel, ValidationError, Field
 from starlette import status
 from tortoise.expressions import Q
 
+from app.system.cache import get_permission_versions, get_user_permissions, get_user_snapshot
 from app.system.models import User
 from app.system.serializers.auth import OAuth2GithubRequestForm
-from app.system.serializers.users import UserDetail
+from app.system.serializers.users import UserSnapshot
+from cores.async_http import HttpRequestError
+from cores.config import settings
 from cores.jwt import Token, create_access_token, verify_token
+from cores.metrics import register_metrics
 from cores.oauth.github import get_primary_email_by_access_token, get_access_token
-from cores.pwd import verify_password
-from cores.response import ResponseModel
-from cores.scope import filter_scopes, scopes
+from cores.pwd import PasswordHashBusy, async_verify_and_update
+from cores.ratelimit import RateLimit, SlidingWindowLimiter
+from cores.redis import ASYNC_REDIS
+from cores.response import FastJSONRoute, ResponseModel
+from cores.revoke import token_revocation
+from cores.scope import compile_scopes, filter_scopes, scope_registry, scopes
 
-auth_router = APIRouter()
+auth_router = APIRouter(route_class=FastJSONRoute)
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/v1/auth/oauth2/password", scopes=scopes)
 
 
+# 登录限流：按用户名和客户端 IP 的滑动窗口
+login_limiter = SlidingWindowLimiter(
+    ASYNC_REDIS,
+    "auth:login",
+    RateLimit("username", settings.login.username_limit, settings.login.username_window),
+    RateLimit("ip", settings.login.ip_limit, settings.login.ip_window),
+)
+login_stats = {"rejected_username": 0, "rejected_ip": 0, "rejected_busy": 0}
+register_metrics("login", lambda: dict(login_stats))
+
+
 class TokenData(BaseModel):
     username: Union[str, None] = None
     scopes: List[str] = Field(default_factory=list)
 
 
+async def check_login_rate(request: Request, username: Optional[str] = None):
+    """
+    登录限流，超出限制时返回 429
+    """
+    ip = request.client.host if request.client else None
+    if limit := await login_limiter.hit(username=username and username.lower(), ip=ip):
+        login_stats[f"rejected_{limit.name}"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": str(limit.window)},
+        )
+
+
 async def authenticate_user(username: str, password: str) -> Union[bool, User]:
-    user = (
-        await User.get_queryset()
-        .prefetch_related("roles__permissions")
-        .get_or_none(Q(username=username) | Q(email=username))
-    )
+    user = await User.get_queryset().get_or_none(Q(username=username) | Q(email=username))
     if not user:
         return False
-    if not verify_password(password, user.hashed_password):
+    try:
+        verified, new_hash = await async_verify_and_update(
+            password,
+            user.hashed_password,
+            max_pending=settings.login.max_pending_verifications,
+        )
+    except PasswordHashBusy:
+        login_stats["rejected_busy"] += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts",
+            headers={"Retry-After": "1"},
+        )
+    if not verified:
         return False
+    # cost 与当前设置不同的哈希在登录成功时重新计算
+    if new_hash is not None:
+        user.hashed_password = new_hash
+        await user.save(update_fields=["hashed_password"])
     return user
 
 
 async def authenticate_user_by_oauth(username: str) -> Union[bool, User]:
-    user = (
-        await User.get_queryset()
-        .prefetch_related("roles__permissions")
-        .get_or_none(Q(username=username) | Q(email=username))
-    )
+    user = await User.get_queryset().get_or_none(Q(username=username) | Q(email=username))
     if not user:
         return False
     return user
 
 
-async def get_current_user(
-    security_scopes: SecurityScopes, token: str = Depends(oauth2_scheme)
-) -> User:
-    if security_scopes.scopes:
-        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
+# 权限过期时，刷新后的 token 通过该响应头下发
+REFRESHED_TOKEN_HEADER = "X-Access-Token"
+
+
+async def create_user_access_token(
+    user_id: int, username: str, permissions: List[str], narrowed: bool = False
+) -> str:
+    """
+    签发 token，并写入当前的权限版本号
+    :param narrowed: scopes 是否只是用户权限的子集（OAuth2 按需申请），刷新时不会扩大
+    """
+    data = {"sub": username}
+    # 完整权限以位图写入，缩小 token；按需申请的 scopes 保留原始列表
+    if narrowed:
+        data["scopes"] = permissions
+        data["narrowed"] = True
+    elif (bitmap := scope_registry.encode(permissions)) is not None:
+        data["sbm"] = bitmap
+        data["srv"] = scope_registry.version
     else:
-        authenticate_value = "Bearer"
-
-    credentials_exception = HTTPException(
-        status_code=status.HTTP_401_UNAUTHORIZED,
-        detail="Could not validate credentials",
-        headers={"WWW-Authenticate": authenticate_value},
-    )
+        data["scopes"] = permissions
+    if versions := await get_permission_versions(user_id):
+        data["gpv"], data["pv"] = versions
+    return create_access_token(data=data)
+
+
+@dataclass
+class AuthContext:
+    """
+    单次请求的鉴权结果，保存在 request.state 上，多个 Security 依赖共用
+    """
+
+    user: UserSnapshot
+    scopes: List[str]
+    bitmap: Optional[str] = None
+
+    def covers_all(self, scope_list: List[str]) -> bool:
+        if self.bitmap is not None:
+            return scope_registry.covers_all(self.bitmap, scope_list)
+        return compile_scopes(tuple(self.scopes)).covers_all(scope_list)
+
+
+async def resolve_auth_context(
+    token: str, response: Response, credentials_exception: HTTPException
+) -> AuthContext:
+    """
+    解析 token 并加载用户，不检查 scopes
+    """
     try:
         payload = verify_token(token)
+        if await token_revocation.is_revoked(payload):
+            raise credentials_exception
 
         username: str = payload.get("sub")
         if username is None:
@@ -75,27 +154,70 @@ async def get_current_user(
     except (InvalidTokenError, ValidationError):
         raise credentials_exception
 
-    user = await User.get_queryset().get_or_none(username=username)
+    user = await get_user_snapshot(username)
     if user is None:
         raise credentials_exception
 
-    for scope in security_scopes.scopes:
-        for user_scope in token_data.scopes:
-            if scope == user_scope or scope.startswith(f"{user_scope}:"):
-                break
+    # 位图 token 的注册表版本与本地不一致时，位图无法解读，同样视为过期
+    bitmap = payload.get("sbm")
+    if bitmap is not None:
+        await scope_registry.ensure_version(payload.get("srv"))
+    stale_bitmap = bitmap is not None and payload.get("srv") != scope_registry.version
+
+    # 权限版本号不一致说明 token 中的 scopes 已过期，改用最新权限并下发新 token
+    versions = await get_permission_versions(user.id)
+    if stale_bitmap or (versions and versions != (payload.get("gpv"), payload.get("pv"))):
+        bitmap = None
+        permissions = await get_user_permissions(user.id)
+        narrowed = payload.get("narrowed", False)
+        if narrowed:
+            permissions = compile_scopes(tuple(permissions))
+            token_data.scopes = [scope for scope in token_data.scopes if permissions.covers(scope)]
         else:
-            raise HTTPException(
-                status_code=status.HTTP_401_UNAUTHORIZED,
-                detail="Not enough permissions",
-                headers={"WWW-Authenticate": authenticate_value},
-            )
+            token_data.scopes = permissions
+        response.headers[REFRESHED_TOKEN_HEADER] = await create_user_access_token(
+            user.id, user.username, token_data.scopes, narrowed=narrowed
+        )
 
-    return user
+    return AuthContext(user=user, scopes=token_data.scopes, bitmap=bitmap)
+
+
+async def get_current_user(
+    security_scopes: SecurityScopes,
+    request: Request,
+    response: Response,
+    token: str = Depends(oauth2_scheme),
+) -> UserSnapshot:
+    if security_scopes.scopes:
+        authenticate_value = f'Bearer scope="{security_scopes.scope_str}"'
+    else:
+        authenticate_value = "Bearer"
+
+    credentials_exception = HTTPException(
+        status_code=status.HTTP_401_UNAUTHORIZED,
+        detail="Could not validate credentials",
+        headers={"WWW-Authenticate": authenticate_value},
+    )
+
+    # 同一请求内声明了多个 Security 依赖时（scopes 不同，FastAPI 不会复用结果），只解析一次
+    context: Optional[AuthContext] = getattr(request.state, "auth", None)
+    if context is None:
+        context = await resolve_auth_context(token, response, credentials_exception)
+        request.state.auth = context
+
+    if not context.covers_all(security_scopes.scopes):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not enough permissions",
+            headers={"WWW-Authenticate": authenticate_value},
+        )
+
+    return context.user
 
 
 async def get_current_active_user(
-    current_user: User = Security(get_current_user),
-) -> UserDetail:
+    current_user: UserSnapshot = Security(get_current_user),
+) -> UserSnapshot:
     if current_user.is_active:
         return current_user
     raise HTTPException(status_code=400, detail="Inactive user")
@@ -103,21 +225,18 @@ async def get_current_active_user(
 
 @auth_router.post("/password", response_model=ResponseModel[Token])
 async def login_from_password(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
+    await check_login_rate(request, form_data.username)
     user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
     # 查询权限
-    permissions = set()
-    for role in user.roles:
-        for permission in role.permissions:
-            permissions.add(permission.name)
+    filter_permissions = await get_user_permissions(user.id)
 
-    filter_permissions = filter_scopes(permissions)
-
-    access_token = create_access_token(data={"sub": user.username, "scopes": filter_permissions})
+    access_token = await create_user_access_token(user.id, user.username, filter_permissions)
     return ResponseModel(
         data=Token(
             access_token=access_token,
@@ -129,27 +248,25 @@ async def login_from_password(
 
 @auth_router.post("/oauth2/password", response_model=Token)
 async def login_from_oauth2_password(
+    request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
 ):
+    await check_login_rate(request, form_data.username)
     user = await authenticate_user(form_data.username, form_data.password)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
-    # 查询权限
-    permissions = set()
-    for role in user.roles:
-        for permission in role.permissions:
-            permissions.add(permission.name)
-
-    permissions &= set(form_data.scopes)
-    if len(permissions) < len(form_data.scopes):
-        raise HTTPException(
-            status_code=400, detail=f"Incorrect permission {set(form_data.scopes) - permissions}"
-        )
+    # 查询权限，申请的 scopes 必须都被用户的权限覆盖
+    permissions = await get_user_permissions(user.id)
+    missing_scopes = compile_scopes(tuple(permissions)).missing(form_data.scopes)
+    if missing_scopes:
+        raise HTTPException(status_code=400, detail=f"Incorrect permission {set(missing_scopes)}")
 
-    filter_permissions = filter_scopes(permissions)
+    filter_permissions = filter_scopes(form_data.scopes)
 
-    access_token = create_access_token(data={"sub": user.username, "scopes": filter_permissions})
+    access_token = await create_user_access_token(
+        user.id, user.username, filter_permissions, narrowed=True
+    )
     return Token(
         access_token=access_token,
         token_type="bearer",
@@ -159,26 +276,30 @@ async def login_from_oauth2_password(
 
 @auth_router.post("/oauth2/github", response_model=ResponseModel[Token])
 async def login_from_oauth2_github(
+    request: Request,
     form_data: OAuth2GithubRequestForm,
 ):
-    # 通过code获取access token
-    token = await get_access_token(form_data.code)
-    # 通过access token获取邮箱
-    primary_email = await get_primary_email_by_access_token(token)
+    await check_login_rate(request)
+    try:
+        # 通过code获取access token
+        token = await get_access_token(form_data.code)
+        if token is None:
+            raise HTTPException(status_code=400, detail="Invalid or expired code")
+        # 通过access token获取邮箱
+        primary_email = await get_primary_email_by_access_token(token)
+    except HttpRequestError as e:
+        raise HTTPException(status_code=e.status_code, detail="GitHub is unavailable")
+    if primary_email is None:
+        raise HTTPException(status_code=400, detail="No primary email on the GitHub account")
     # 通过email查询用户
     user = await authenticate_user_by_oauth(primary_email.email)
     if not user:
         raise HTTPException(status_code=400, detail="Incorrect username or password")
 
     # 查询用户权限
-    permissions = set()
-    for role in user.roles:
-        for permission in role.permissions:
-            permissions.add(permission.name)
-
-    filter_permissions = filter_scopes(permissions)
+    filter_permissions = await get_user_permissions(user.id)
 
-    access_token = create_access_token(data={"sub": user.username, "scopes": filter_permissions})
+    access_token = await create_user_access_token(user.id, user.username, filter_permissions)
     return ResponseModel(
         data=Token(
             access_token=access_token,
@@ -189,5 +310,20 @@ async def login_from_oauth2_github(
 
 
 @auth_router.post("/logout", response_model=ResponseModel)
-async def logout():
+async def logout(token: str = Depends(oauth2_scheme)):
+    """
+    退出登录，吊销当前 token
+    """
+    payload = verify_token(token)
+    await token_revocation.revoke_token(payload)
+    return ResponseModel()
+
+
+@auth_router.post("/logout/all", response_model=ResponseModel)
+async def logout_all(token: str = Depends(oauth2_scheme)):
+    """
+    退出所有登录，吊销当前用户已签发的全部 token
+    """
+    payload = verify_token(token)
+    await token_revocation.revoke_user(payload["sub"])
     return ResponseModel()
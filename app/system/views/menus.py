@@ -1,24 +1,26 @@
-import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Security
 from tortoise.contrib.fastapi import HTTPNotFoundError
 from tortoise.exceptions import DoesNotExist
 
 from app.system.filters import ListMenuFilterSet
-from app.system.models import Menu, User
+from app.system.models import Menu
 from app.system.serializers.menus import (
+    MenuBulkPatch,
     MenuCreate,
     MenuDetail,
     MenuDetailTree,
     MenuPatch,
     MenuUpdate,
 )
+from app.system.serializers.users import UserSnapshot
 from app.system.views.auth import get_current_active_user
-from cores.paginate import PageModel, PaginationParams, paginate
-from cores.response import ResponseModel
+from cores.bulk import MAX_BULK_SIZE, IdsParams, bulk_create, bulk_soft_delete, bulk_update
+from cores.paginate import PageResult, PaginationParams, from_queryset, paginate
+from cores.response import FastJSONRoute, ResponseModel
 
-menu_router = APIRouter()
+menu_router = APIRouter(route_class=FastJSONRoute)
 
 
 @menu_router.post(
@@ -29,7 +31,7 @@ menu_router = APIRouter()
 )
 async def create_menu(
     menu: MenuCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     """
     创建一个新的菜单。
@@ -43,17 +45,18 @@ async def create_menu(
 @menu_router.get(
     "",
     summary="获取菜单列表",
-    response_model=ResponseModel[PageModel[MenuDetail]],
+    response_model=ResponseModel[PageResult[MenuDetail]],
     dependencies=[Security(get_current_active_user, scopes=["system:menu:read"])],
 )
 async def list_menus(
     menu_filter: ListMenuFilterSet = Depends(),
     pagination: PaginationParams = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有菜单的列表，可以按名称和描述进行搜索。
+    获取所有菜单的列表，可以按名称和描述进行搜索，或按 id 批量获取。
     """
-    query = menu_filter.apply_filters()
+    query = ids.apply(menu_filter.apply_filters(), pagination)
     page_data = await paginate(query, pagination, MenuDetail)
     return ResponseModel(data=page_data)
 
@@ -66,12 +69,13 @@ async def list_menus(
 )
 async def all_menus(
     menu_filter: ListMenuFilterSet = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有菜单的列表，可以按名称和描述进行搜索。
+    获取所有菜单的列表，可以按名称和描述进行搜索，或按 id 批量获取。
     """
-    query = menu_filter.apply_filters()
-    menus = await MenuDetail.from_queryset(query)
+    query = ids.apply(menu_filter.apply_filters())
+    menus = await from_queryset(MenuDetail, query)
     return ResponseModel(data=menus)
 
 
@@ -92,6 +96,62 @@ async def all_menus_tree(
     return ResponseModel(data=tree)
 
 
+@menu_router.post(
+    "/bulk",
+    summary="批量创建菜单",
+    response_model=ResponseModel[List[MenuDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:menu:create"])],
+)
+async def bulk_create_menus(
+    menus: List[MenuCreate] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+):
+    """
+    在一个事务内批量创建菜单，任一条目校验失败时全部不创建，返回 422 及各条目的错误。
+    - **menus**: 要创建的菜单列表。
+    """
+    menu_objs = await bulk_create(Menu, [menu.dict() for menu in menus], creator_id=current_user.id)
+    response = [await MenuDetail.from_tortoise_orm(obj) for obj in menu_objs]
+    return ResponseModel(data=response)
+
+
+@menu_router.patch(
+    "/bulk",
+    summary="批量更新菜单信息",
+    response_model=ResponseModel[List[MenuDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:menu:update"])],
+)
+async def bulk_patch_menus(
+    menus: List[MenuBulkPatch] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量更新菜单，每个条目包含 id 和要更新的字段；任一条目校验失败时全部不更新。
+    - **menus**: 要更新的菜单列表。
+    """
+    menu_objs, _ = await bulk_update(
+        Menu, [(menu.id, menu.dict(exclude_unset=True, exclude={"id"})) for menu in menus]
+    )
+    response = [await MenuDetail.from_tortoise_orm(obj) for obj in menu_objs]
+    return ResponseModel(data=response)
+
+
+@menu_router.delete(
+    "/bulk",
+    summary="批量删除菜单",
+    response_model=ResponseModel[dict],
+    dependencies=[Security(get_current_active_user, scopes=["system:menu:delete"])],
+)
+async def bulk_delete_menus(
+    ids: List[int] = Query(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量逻辑删除菜单，任一 id 不存在时全部不删除。
+    - **ids**: 要删除的菜单 id，多个 id 重复传参：?ids=1&ids=2
+    """
+    menu_objs = await bulk_soft_delete(Menu, ids)
+    return ResponseModel(data={"deleted": len(menu_objs)})
+
+
 @menu_router.get(
     "/{menu_id}",
     summary="获取菜单详细信息",
@@ -168,8 +228,7 @@ async def delete_menu(menu_id: int):
     """
     try:
         menu = await Menu.get_queryset().get(id=menu_id)
-        Menu.deleted_at = datetime.datetime.now()
-        await menu.save()
+        await menu.soft_delete()
         return ResponseModel()
     except DoesNotExist:
         raise HTTPException(status_code=404, detail=f"Menu {menu_id} not found")
@@ -1,23 +1,30 @@
-import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Security
 from tortoise.contrib.fastapi import HTTPNotFoundError
 from tortoise.exceptions import DoesNotExist
 
+from app.system.cache import (
+    bump_global_permission_version,
+    rebuild_permission_users_permissions,
+)
 from app.system.filters import ListPermissionFilterSet
-from app.system.models import Permission, User
+from app.system.models import Permission
 from app.system.serializers.permission import (
+    PermissionBulkPatch,
     PermissionCreate,
     PermissionDetail,
     PermissionPatch,
     PermissionUpdate,
 )
+from app.system.serializers.users import UserSnapshot
 from app.system.views.auth import get_current_active_user
-from cores.paginate import PageModel, PaginationParams, paginate
-from cores.response import ResponseModel
+from cores.bulk import MAX_BULK_SIZE, IdsParams, bulk_create, bulk_soft_delete, bulk_update
+from cores.paginate import PageResult, PaginationParams, from_queryset, paginate
+from cores.response import FastJSONRoute, ResponseModel
+from cores.scope import init_scopes
 
-permission_router = APIRouter()
+permission_router = APIRouter(route_class=FastJSONRoute)
 
 
 @permission_router.post(
@@ -28,13 +35,14 @@ permission_router = APIRouter()
 )
 async def create_permission(
     permission: PermissionCreate,
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     """
     创建一个新的权限。
     - **permission**: 要创建的权限的详细信息。
     """
     permission_obj = await Permission.create(**permission.dict(), creator_id=current_user.id)
+    await init_scopes()
     response = await PermissionDetail.from_tortoise_orm(permission_obj)
     return ResponseModel(data=response)
 
@@ -42,17 +50,18 @@ async def create_permission(
 @permission_router.get(
     "",
     summary="获取权限列表",
-    response_model=ResponseModel[PageModel[PermissionDetail]],
+    response_model=ResponseModel[PageResult[PermissionDetail]],
     dependencies=[Security(get_current_active_user, scopes=["system:permission:read"])],
 )
 async def list_permissions(
     permission_filter: ListPermissionFilterSet = Depends(),
     pagination: PaginationParams = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有权限的列表，可以按名称和描述进行搜索。
+    获取所有权限的列表，可以按名称和描述进行搜索，或按 id 批量获取。
     """
-    query = permission_filter.apply_filters()
+    query = ids.apply(permission_filter.apply_filters(), pagination)
     page_data = await paginate(query, pagination, PermissionDetail)
     return ResponseModel(data=page_data)
 
@@ -65,15 +74,85 @@ async def list_permissions(
 )
 async def all_permissions(
     permission_filter: ListPermissionFilterSet = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有权限的列表，可以按名称和描述进行搜索。
+    获取所有权限的列表，可以按名称和描述进行搜索，或按 id 批量获取。
     """
-    query = permission_filter.apply_filters()
-    permissions = await PermissionDetail.from_queryset(query)
+    query = ids.apply(permission_filter.apply_filters())
+    permissions = await from_queryset(PermissionDetail, query)
     return ResponseModel(data=permissions)
 
 
+@permission_router.post(
+    "/bulk",
+    summary="批量创建权限",
+    response_model=ResponseModel[List[PermissionDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:permission:create"])],
+)
+async def bulk_create_permissions(
+    permissions: List[PermissionCreate] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+    current_user: UserSnapshot = Depends(get_current_active_user),
+):
+    """
+    在一个事务内批量创建权限，任一条目校验失败时全部不创建，返回 422 及各条目的错误。
+    - **permissions**: 要创建的权限列表。
+    """
+    permission_objs = await bulk_create(
+        Permission, [permission.dict() for permission in permissions], creator_id=current_user.id
+    )
+    await init_scopes()
+    response = [await PermissionDetail.from_tortoise_orm(obj) for obj in permission_objs]
+    return ResponseModel(data=response)
+
+
+@permission_router.patch(
+    "/bulk",
+    summary="批量更新权限信息",
+    response_model=ResponseModel[List[PermissionDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:permission:update"])],
+)
+async def bulk_patch_permissions(
+    permissions: List[PermissionBulkPatch] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量更新权限，每个条目包含 id 和要更新的字段；任一条目校验失败时全部不更新。
+    - **permissions**: 要更新的权限列表。
+    """
+    permission_objs, _ = await bulk_update(
+        Permission,
+        [
+            (permission.id, permission.dict(exclude_unset=True, exclude={"id"}))
+            for permission in permissions
+        ],
+    )
+    await init_scopes()
+    await rebuild_permission_users_permissions(*[obj.id for obj in permission_objs])
+    await bump_global_permission_version()
+    response = [await PermissionDetail.from_tortoise_orm(obj) for obj in permission_objs]
+    return ResponseModel(data=response)
+
+
+@permission_router.delete(
+    "/bulk",
+    summary="批量删除权限",
+    response_model=ResponseModel[dict],
+    dependencies=[Security(get_current_active_user, scopes=["system:permission:delete"])],
+)
+async def bulk_delete_permissions(
+    ids: List[int] = Query(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量逻辑删除权限，任一 id 不存在时全部不删除。
+    - **ids**: 要删除的权限 id，多个 id 重复传参：?ids=1&ids=2
+    """
+    permission_objs = await bulk_soft_delete(Permission, ids)
+    await init_scopes()
+    await rebuild_permission_users_permissions(*ids)
+    await bump_global_permission_version()
+    return ResponseModel(data={"deleted": len(permission_objs)})
+
+
 @permission_router.get(
     "/{permission_id}",
     summary="获取权限详细信息",
@@ -114,6 +193,9 @@ async def update_permission(permission_id: int, permission: PermissionUpdate):
     await Permission.get_queryset().filter(id=permission_id).update(
         **permission.dict(exclude_unset=True)
     )
+    await init_scopes()
+    await rebuild_permission_users_permissions(permission_id)
+    await bump_global_permission_version()
     return ResponseModel()
 
 
@@ -137,6 +219,9 @@ async def patch_permission(permission_id: int, permission: PermissionPatch):
     await Permission.get_queryset().filter(id=permission_id).update(
         **permission.dict(exclude_unset=True)
     )
+    await init_scopes()
+    await rebuild_permission_users_permissions(permission_id)
+    await bump_global_permission_version()
     return ResponseModel()
 
 
@@ -154,8 +239,10 @@ async def delete_permission(permission_id: int):
     """
     try:
         permission = await Permission.get_queryset().get(id=permission_id)
-        permission.deleted_at = datetime.datetime.now()
-        await permission.save()
+        await permission.soft_delete()
+        await init_scopes()
+        await rebuild_permission_users_permissions(permission_id)
+        await bump_global_permission_version()
         return ResponseModel()
     except DoesNotExist:
         raise HTTPException(status_code=404, detail=f"Permission {permission_id} not found")
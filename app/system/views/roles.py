@@ -1,18 +1,25 @@
-import datetime
 from typing import List
 
-from fastapi import APIRouter, Depends, HTTPException, Security
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Security
 from tortoise.contrib.fastapi import HTTPNotFoundError
 from tortoise.exceptions import DoesNotExist
 
+from app.system.cache import rebuild_role_users_permissions
 from app.system.filters import ListRoleFilterSet
 from app.system.models import Role
-from app.system.serializers.roles import RoleCreate, RoleDetail, RolePatch, RoleUpdate
+from app.system.serializers.roles import (
+    RoleBulkPatch,
+    RoleCreate,
+    RoleDetail,
+    RolePatch,
+    RoleUpdate,
+)
 from app.system.views.auth import get_current_active_user
-from cores.paginate import PageModel, PaginationParams, paginate
-from cores.response import ResponseModel
+from cores.bulk import MAX_BULK_SIZE, IdsParams, bulk_create, bulk_soft_delete, bulk_update
+from cores.paginate import PageResult, PaginationParams, from_queryset, paginate
+from cores.response import FastJSONRoute, ResponseModel
 
-role_router = APIRouter()
+role_router = APIRouter(route_class=FastJSONRoute)
 
 
 @role_router.post(
@@ -34,17 +41,18 @@ async def create_role(role: RoleCreate):
 @role_router.get(
     "",
     summary="获取角色列表",
-    response_model=ResponseModel[PageModel[RoleDetail]],
+    response_model=ResponseModel[PageResult[RoleDetail]],
     dependencies=[Security(get_current_active_user, scopes=["system:role:read"])],
 )
 async def list_roles(
     role_filter: ListRoleFilterSet = Depends(),
     pagination: PaginationParams = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有角色的列表。
+    获取所有角色的列表，或按 id 批量获取。
     """
-    query = role_filter.apply_filters()
+    query = ids.apply(role_filter.apply_filters(), pagination)
     page_data = await paginate(query, pagination, RoleDetail)
     return ResponseModel(data=page_data)
 
@@ -57,15 +65,72 @@ async def list_roles(
 )
 async def list_roles(
     role_filter: ListRoleFilterSet = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
-    获取所有角色的列表。
+    获取所有角色的列表，或按 id 批量获取。
     """
-    query = role_filter.apply_filters()
-    role_data = await RoleDetail.from_queryset(query)
+    query = ids.apply(role_filter.apply_filters())
+    role_data = await from_queryset(RoleDetail, query)
     return ResponseModel(data=role_data)
 
 
+@role_router.post(
+    "/bulk",
+    summary="批量创建角色",
+    response_model=ResponseModel[List[RoleDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:role:create"])],
+)
+async def bulk_create_roles(
+    roles: List[RoleCreate] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量创建角色，任一条目校验失败时全部不创建，返回 422 及各条目的错误。
+    - **roles**: 要创建的角色列表。
+    """
+    role_objs = await bulk_create(Role, [role.dict() for role in roles])
+    response = [await RoleDetail.from_tortoise_orm(obj) for obj in role_objs]
+    return ResponseModel(data=response)
+
+
+@role_router.patch(
+    "/bulk",
+    summary="批量更新角色信息",
+    response_model=ResponseModel[List[RoleDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:role:update"])],
+)
+async def bulk_patch_roles(
+    roles: List[RoleBulkPatch] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量更新角色，每个条目包含 id 和要更新的字段；任一条目校验失败时全部不更新。
+    - **roles**: 要更新的角色列表。
+    """
+    role_objs, _ = await bulk_update(
+        Role, [(role.id, role.dict(exclude_unset=True, exclude={"id"})) for role in roles]
+    )
+    response = [await RoleDetail.from_tortoise_orm(obj) for obj in role_objs]
+    return ResponseModel(data=response)
+
+
+@role_router.delete(
+    "/bulk",
+    summary="批量删除角色",
+    response_model=ResponseModel[dict],
+    dependencies=[Security(get_current_active_user, scopes=["system:role:delete"])],
+)
+async def bulk_delete_roles(
+    ids: List[int] = Query(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量逻辑删除角色，任一 id 不存在时全部不删除。
+    - **ids**: 要删除的角色 id，多个 id 重复传参：?ids=1&ids=2
+    """
+    role_objs = await bulk_soft_delete(Role, ids)
+    await rebuild_role_users_permissions(*ids)
+    return ResponseModel(data={"deleted": len(role_objs)})
+
+
 @role_router.get(
     "/{role_id}",
     summary="获取角色详细信息",
@@ -142,8 +207,8 @@ async def delete_role(role_id: int):
     """
     try:
         role = await Role.get_queryset().get(id=role_id)
-        role.deleted_at = datetime.datetime.now()
-        await role.save()
+        await role.soft_delete()
+        await rebuild_role_users_permissions(role.id)
         return ResponseModel()
     except DoesNotExist:
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
@@ -7,9 +7,11 @@ from app.system.models import Menu, Role
 from app.system.serializers.menus import MenuDetail
 from app.system.serializers.roles import RoleDetail
 from app.system.views.auth import get_current_active_user
-from cores.response import ResponseModel
+from cores.m2m import M2MSyncMode, sync_m2m
+from cores.paginate import from_queryset
+from cores.response import FastJSONRoute, ResponseModel
 
-role_menu_router = APIRouter()
+role_menu_router = APIRouter(route_class=FastJSONRoute)
 
 
 @role_menu_router.get(
@@ -33,7 +35,7 @@ async def get_role_menus(role_id: int):
     if not role:
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
-    menus_data = await MenuDetail.from_queryset(role.menus.all())
+    menus_data = await from_queryset(MenuDetail, role.menus.all())
     return ResponseModel(data=menus_data)
 
 
@@ -59,14 +61,13 @@ async def add_permission_to_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     menus = await Menu.get_queryset().filter(id__in=permission_ids).all()
-    if len(menus) != len(permission_ids):
+    if len(menus) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in menus}
         raise HTTPException(
             status_code=404,
             detail=f"Menus with IDs {missing_ids} not found",
         )
-    menus_need_add = [menu for menu in menus if menu not in role.menus]
-    await role.menus.add(*menus_need_add)
+    await sync_m2m(role.menus, permission_ids, M2MSyncMode.ADD)
     return ResponseModel()
 
 
@@ -92,14 +93,14 @@ async def delete_permission_from_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     menus = await Menu.get_queryset().filter(id__in=permission_ids).all()
-    if len(menus) != len(permission_ids):
+    if len(menus) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in menus}
         raise HTTPException(
             status_code=404,
             detail=f"Menus with IDs {missing_ids} not found",
         )
 
-    await role.menus.remove(*menus)
+    await sync_m2m(role.menus, permission_ids, M2MSyncMode.REMOVE)
     return ResponseModel()
 
 
@@ -125,13 +126,12 @@ async def update_menus_for_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     menus = await Menu.get_queryset().filter(id__in=permission_ids).all()
-    if len(menus) != len(permission_ids):
+    if len(menus) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in menus}
         raise HTTPException(
             status_code=404,
             detail=f"Menus with IDs {missing_ids} not found",
         )
 
-    await role.menus.clear()
-    await role.menus.add(*menus)
+    await sync_m2m(role.menus, permission_ids)
     return ResponseModel()
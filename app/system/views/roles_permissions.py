@@ -3,12 +3,15 @@ from typing import List
 from fastapi import APIRouter, HTTPException, Security
 from tortoise.contrib.fastapi import HTTPNotFoundError
 
+from app.system.cache import rebuild_role_users_permissions
 from app.system.models import Permission, Role
 from app.system.serializers.permission import PermissionDetail
 from app.system.views.auth import get_current_active_user
-from cores.response import ResponseModel
+from cores.m2m import M2MSyncMode, sync_m2m
+from cores.paginate import from_queryset
+from cores.response import FastJSONRoute, ResponseModel
 
-role_permission_router = APIRouter()
+role_permission_router = APIRouter(route_class=FastJSONRoute)
 
 
 @role_permission_router.get(
@@ -32,7 +35,7 @@ async def get_role_permissions(role_id: int):
     if not role:
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
-    permissions_data = await PermissionDetail.from_queryset(role.permissions.all())
+    permissions_data = await from_queryset(PermissionDetail, role.permissions.all())
     return ResponseModel(data=permissions_data)
 
 
@@ -58,14 +61,14 @@ async def add_permission_to_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     permissions = await Permission.get_queryset().filter(id__in=permission_ids).all()
-    if len(permissions) != len(permission_ids):
+    if len(permissions) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in permissions}
         raise HTTPException(
             status_code=404,
             detail=f"Permissions with IDs {missing_ids} not found",
         )
-    permissions_need_add = [permission for permission in permissions if permission not in role.permissions]
-    await role.permissions.add(*permissions_need_add)
+    await sync_m2m(role.permissions, permission_ids, M2MSyncMode.ADD)
+    await rebuild_role_users_permissions(role.id)
     return ResponseModel()
 
 
@@ -91,14 +94,15 @@ async def delete_permission_from_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     permissions = await Permission.get_queryset().filter(id__in=permission_ids).all()
-    if len(permissions) != len(permission_ids):
+    if len(permissions) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in permissions}
         raise HTTPException(
             status_code=404,
             detail=f"Permissions with IDs {missing_ids} not found",
         )
 
-    await role.permissions.remove(*permissions)
+    await sync_m2m(role.permissions, permission_ids, M2MSyncMode.REMOVE)
+    await rebuild_role_users_permissions(role.id)
     return ResponseModel()
 
 
@@ -124,13 +128,13 @@ async def update_permissions_for_role(role_id: int, permission_ids: List[int]):
         raise HTTPException(status_code=404, detail=f"Role {role_id} not found")
 
     permissions = await Permission.get_queryset().filter(id__in=permission_ids).all()
-    if len(permissions) != len(permission_ids):
+    if len(permissions) != len(set(permission_ids)):
         missing_ids = set(permission_ids) - {permission.id for permission in permissions}
         raise HTTPException(
             status_code=404,
             detail=f"Permissions with IDs {missing_ids} not found",
         )
 
-    await role.permissions.clear()
-    await role.permissions.add(*permissions)
+    await sync_m2m(role.permissions, permission_ids)
+    await rebuild_role_users_permissions(role.id)
     return ResponseModel()
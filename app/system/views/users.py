@@ -1,15 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException, Security
+import asyncio
+from typing import List
+
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Security
 from tortoise.contrib.fastapi import HTTPNotFoundError
 
+from app.system.cache import invalidate_user_snapshot
 from app.system.filters import ListUserFilterSet
 from app.system.models import User
-from app.system.serializers.users import UserCreate, UserDetail, UserPatch, UserUpdate
+from app.system.serializers.users import (
+    UserBulkPatch,
+    UserCreate,
+    UserDetail,
+    UserPatch,
+    UserUpdate,
+)
 from app.system.views.auth import get_current_active_user
-from cores.paginate import PageModel, PaginationParams, paginate
-from cores.pwd import get_password_hash
-from cores.response import ResponseModel
+from cores.bulk import (
+    MAX_BULK_SIZE,
+    IdsParams,
+    bulk_create,
+    bulk_error,
+    bulk_soft_delete,
+    bulk_update,
+    find_unique_conflicts,
+)
+from cores.config import settings
+from cores.paginate import PageResult, PaginationParams, paginate
+from cores.pwd import async_get_password_hash
+from cores.response import FastJSONRoute, ResponseModel
+from cores.revoke import token_revocation
+
+user_router = APIRouter(route_class=FastJSONRoute)
+
+# 批量创建用户时每个用户都要计算一次 bcrypt 哈希，单次条数比其他资源少
+MAX_BULK_USERS = 200
+# 批量创建时同时计算的哈希数，其余哈希线程留给登录校验
+BULK_HASH_CONCURRENCY = max(1, settings.security.pwd_hash_workers // 2)
 
-user_router = APIRouter()
+
+def default_password(username: str) -> str:
+    return f"{username}@123456"
 
 
 async def validate_user(user_id: int) -> User:
@@ -29,8 +59,7 @@ async def create_user(user: UserCreate):
     创建一个新的系统用户。
     - **user**: 要创建的用户的详细信息。
     """
-    password = f"{user.username}@123456"
-    hashed_password = get_password_hash(password)
+    hashed_password = await async_get_password_hash(default_password(user.username))
     user_obj = await User.create(**user.dict(exclude_unset=True), hashed_password=hashed_password)
     user_data = await UserDetail.from_tortoise_orm(user_obj)
     return ResponseModel(data=user_data)
@@ -39,12 +68,13 @@ async def create_user(user: UserCreate):
 @user_router.get(
     "",
     summary="获取用户列表",
-    response_model=ResponseModel[PageModel[UserDetail]],
+    response_model=ResponseModel[PageResult[UserDetail]],
     dependencies=[Security(get_current_active_user, scopes=["system:user:read"])],
 )
 async def list_user(
     user_filter: ListUserFilterSet = Depends(),
     pagination: PaginationParams = Depends(),
+    ids: IdsParams = Depends(),
 ):
     """
     获取系统用户列表，支持多种过滤条件。
@@ -52,12 +82,92 @@ async def list_user(
     - **email**: 电子邮件过滤条件（模糊匹配）。
     - **is_active**: 是否激活过滤条件。
     - **is_superuser**: 是否超级用户过滤条件。
+    - **ids**: 按 id 批量获取，给定时一页返回全部。
     """
-    query = user_filter.apply_filters()
+    query = ids.apply(user_filter.apply_filters(), pagination)
     page_data = await paginate(query, pagination, UserDetail)
     return ResponseModel(data=page_data)
 
 
+async def _hash_default_passwords(usernames: List[str]) -> List[str]:
+    semaphore = asyncio.Semaphore(BULK_HASH_CONCURRENCY)
+
+    async def _hash(username: str) -> str:
+        async with semaphore:
+            return await async_get_password_hash(default_password(username))
+
+    return await asyncio.gather(*map(_hash, usernames))
+
+
+@user_router.post(
+    "/bulk",
+    summary="批量创建用户",
+    response_model=ResponseModel[List[UserDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:user:create"])],
+)
+async def bulk_create_users(
+    users: List[UserCreate] = Body(..., min_length=1, max_length=MAX_BULK_USERS),
+):
+    """
+    在一个事务内批量创建用户，任一条目校验失败时全部不创建，返回 422 及各条目的错误。
+    - **users**: 要创建的用户列表。
+    """
+    items = [user.dict(exclude_unset=True) for user in users]
+    # 先校验再计算哈希，避免为失败的批次计算大量哈希；写入时在事务内会再校验一次
+    if errors := await find_unique_conflicts(User, items):
+        raise bulk_error(errors)
+    hashed_passwords = await _hash_default_passwords([user.username for user in users])
+    for item, hashed_password in zip(items, hashed_passwords):
+        item["hashed_password"] = hashed_password
+    user_objs = await bulk_create(User, items)
+    response = [await UserDetail.from_tortoise_orm(obj) for obj in user_objs]
+    return ResponseModel(data=response)
+
+
+@user_router.patch(
+    "/bulk",
+    summary="批量更新用户信息",
+    response_model=ResponseModel[List[UserDetail]],
+    dependencies=[Security(get_current_active_user, scopes=["system:user:update"])],
+)
+async def bulk_patch_users(
+    users: List[UserBulkPatch] = Body(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量更新用户，每个条目包含 id 和要更新的字段；任一条目校验失败时全部不更新。
+    - **users**: 要更新的用户列表。
+    """
+    user_objs, previous = await bulk_update(
+        User, [(user.id, user.dict(exclude_unset=True, exclude={"id"})) for user in users]
+    )
+    # 快照按用户名缓存，修改了用户名的用户还要使原用户名的快照失效
+    usernames = {obj.username for obj in user_objs}
+    usernames.update(values["username"] for values in previous.values() if "username" in values)
+    await invalidate_user_snapshot(*usernames)
+    response = [await UserDetail.from_tortoise_orm(obj) for obj in user_objs]
+    return ResponseModel(data=response)
+
+
+@user_router.delete(
+    "/bulk",
+    summary="批量删除用户",
+    response_model=ResponseModel[dict],
+    dependencies=[Security(get_current_active_user, scopes=["system:user:delete"])],
+)
+async def bulk_delete_users(
+    ids: List[int] = Query(..., min_length=1, max_length=MAX_BULK_SIZE),
+):
+    """
+    在一个事务内批量逻辑删除用户，任一 id 不存在时全部不删除。
+    - **ids**: 要删除的用户 id，多个 id 重复传参：?ids=1&ids=2
+    """
+    user_objs = await bulk_soft_delete(User, ids)
+    usernames = [obj.username for obj in user_objs]
+    await invalidate_user_snapshot(*usernames)
+    await token_revocation.revoke_users(*usernames)
+    return ResponseModel(data={"deleted": len(user_objs)})
+
+
 @user_router.get(
     "/{user_id}",
     summary="获取用户详细信息",
@@ -94,6 +204,7 @@ async def update_user(user_id: int, user: UserUpdate):
     if not user_obj:
         raise HTTPException(status_code=404, detail=f"User {user_id} not found")
     await User.get_queryset().filter(id=user_id).update(**user.dict(exclude_unset=True))
+    await invalidate_user_snapshot(user_obj.username)
 
     user_data = await UserDetail.from_tortoise_orm(user_obj)
     return ResponseModel(data=user_data)
@@ -112,11 +223,9 @@ async def patch_user(user_id: int, user: UserPatch):
     - **user_id**: 要更新的用户的唯一标识符。
     - **user**: 更新后的用户详细信息（仅更新提供的字段）。
     """
-    updated_count = (
-        await User.get_queryset().filter(id=user_id).update(**user.dict(exclude_unset=True))
-    )
-    if not updated_count:
-        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
+    user_obj = await validate_user(user_id)
+    await User.get_queryset().filter(id=user_id).update(**user.dict(exclude_unset=True))
+    await invalidate_user_snapshot(user_obj.username)
     user_obj = await User.get_queryset().get(id=user_id)
     user_data = await UserDetail.from_tortoise_orm(user_obj)
     return ResponseModel(data=user_data)
@@ -134,7 +243,8 @@ async def delete_user(user_id: int):
     删除指定 ID 的用户。
     - **user_id**: 要删除的用户的唯一标识符。
     """
-    deleted_count = await User.get_queryset().filter(id=user_id).delete()
-    if not deleted_count:
-        raise HTTPException(status_code=404, detail=f"User {user_id} not found")
-    return ResponseModel(data={"deleted": deleted_count})
+    user_obj = await validate_user(user_id)
+    await user_obj.soft_delete()
+    await invalidate_user_snapshot(user_obj.username)
+    await token_revocation.revoke_user(user_obj.username)
+    return ResponseModel(data={"deleted": 1})
@@ -1,18 +1,18 @@
-import datetime
 from typing import List
 
 from fastapi import APIRouter, Depends, HTTPException
 from tortoise.contrib.fastapi import HTTPNotFoundError
 from tortoise.exceptions import DoesNotExist
 
+from app.system.cache import get_user_permissions, invalidate_user_snapshot
 from app.system.models import Menu, User
 from app.system.serializers.menus import MenuDetailTree
-from app.system.serializers.users import UserDetail, UserUpdate
+from app.system.serializers.users import UserDetail, UserSnapshot, UserUpdate
 from app.system.views.auth import get_current_active_user
-from cores.response import ResponseModel
-from cores.scope import filter_scopes
+from cores.response import FastJSONRoute, ResponseModel
+from cores.revoke import token_revocation
 
-user_me_router = APIRouter()
+user_me_router = APIRouter(route_class=FastJSONRoute)
 
 
 @user_me_router.get(
@@ -20,8 +20,11 @@ user_me_router = APIRouter()
     summary="获取我的详细信息",
     response_model=ResponseModel[UserDetail],
 )
-async def get_user_me(current_user: User = Depends(get_current_active_user)):
-    user_data = UserDetail.from_orm(current_user)
+async def get_user_me(current_user: UserSnapshot = Depends(get_current_active_user)):
+    user = await User.get_queryset().get_or_none(id=current_user.id)
+    if not user:
+        raise HTTPException(status_code=404, detail=f"User {current_user.id} not found")
+    user_data = await UserDetail.from_tortoise_orm(user)
     return ResponseModel(data=user_data)
 
 
@@ -30,8 +33,11 @@ async def get_user_me(current_user: User = Depends(get_current_active_user)):
     summary="更新我的详细信息",
     response_model=ResponseModel[UserDetail],
 )
-async def update_user_me(user: UserUpdate, current_user: User = Depends(get_current_active_user)):
+async def update_user_me(
+    user: UserUpdate, current_user: UserSnapshot = Depends(get_current_active_user)
+):
     await User.get_queryset().filter(id=current_user.id).update(**user.dict(exclude_unset=True))
+    await invalidate_user_snapshot(current_user.username)
     return ResponseModel()
 
 
@@ -42,16 +48,17 @@ async def update_user_me(user: UserUpdate, current_user: User = Depends(get_curr
     responses={404: {"model": HTTPNotFoundError}},
 )
 async def delete_user_me(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     """
     删除指定 ID 的用户。
     - **user_id**: 要删除的用户的唯一标识符。
     """
     try:
-        menu = await User.get_queryset().get(id=current_user.id)
-        User.deleted_at = datetime.datetime.now()
-        await menu.save()
+        user = await User.get_queryset().get(id=current_user.id)
+        await user.soft_delete()
+        await invalidate_user_snapshot(current_user.username)
+        await token_revocation.revoke_user(current_user.username)
         return ResponseModel()
     except DoesNotExist:
         raise HTTPException(status_code=404, detail=f"User {current_user.id} not found")
@@ -63,7 +70,7 @@ async def delete_user_me(
     response_model=ResponseModel[List[str]],
 )
 async def get_user_me_roles(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     # 查询用户并预加载关联的角色和权限
     user = await User.filter(id=current_user.id).prefetch_related("roles").first()
@@ -78,20 +85,9 @@ async def get_user_me_roles(
     response_model=ResponseModel[List[str]],
 )
 async def get_user_me_permissions(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
-    # 查询用户并预加载关联的权限
-    user = await User.filter(id=current_user.id).prefetch_related("roles__permissions").first()
-    if not user:
-        return []
-
-    # 从所有角色中获取权限
-    permissions = set()
-    for role in user.roles:
-        for permission in role.permissions:
-            permissions.add(permission.name)
-
-    filter_permissions = filter_scopes(permissions)
+    filter_permissions = await get_user_permissions(current_user.id)
     return ResponseModel(data=filter_permissions)
 
 
@@ -101,7 +97,7 @@ async def get_user_me_permissions(
     response_model=ResponseModel[List[MenuDetailTree]],
 )
 async def get_user_me_menus(
-    current_user: User = Depends(get_current_active_user),
+    current_user: UserSnapshot = Depends(get_current_active_user),
 ):
     menus = await Menu.get_queryset().filter(roles__users__id=current_user.id).distinct()
     tree = MenuDetailTree.from_menu_list(menus=menus)
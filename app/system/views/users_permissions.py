@@ -2,12 +2,13 @@ from typing import List
 
 from fastapi import APIRouter, Security
 
-from app.system.models import User
+from app.system.models import Permission
 from app.system.serializers.permission import PermissionDetail
 from app.system.views.auth import get_current_active_user
-from cores.response import ResponseModel
+from cores.paginate import from_queryset
+from cores.response import FastJSONRoute, ResponseModel
 
-user_permission_route = APIRouter()
+user_permission_route = APIRouter(route_class=FastJSONRoute)
 
 
 # 获取用户的权限列表
@@ -27,17 +28,12 @@ async def get_user_permissions(user_id: int):
     获取指定用户的权限列表。
     - **user_id**: 用户的唯一标识符。
     """
-    # 查询用户并预加载关联的角色
-    user = await User.get_queryset().prefetch_related("roles__permissions").get_or_none(id=user_id)
-    if not user:
-        return ResponseModel(data=[])
-
-    # 直接从预加载的数据中获取权限，避免重复I/O操作
-    permissions = set()
-    for role in user.roles:
-        permissions.update(role.permissions)
-
-    # 将权限对象转换为 PermissionDetail 响应模型
-    permissions_list = [PermissionDetail.from_orm(permission) for permission in permissions]
+    # 通过关联表一次查询出用户所有角色的权限
+    query = (
+        Permission.get_queryset()
+        .filter(roles__users__id=user_id, roles__deleted_at=None)
+        .distinct()
+    )
+    permissions_list = await from_queryset(PermissionDetail, query)
 
     return ResponseModel(data=permissions_list)
@@ -2,13 +2,15 @@ from typing import List
 
 from fastapi import APIRouter, HTTPException, Security
 
+from app.system.cache import rebuild_user_permissions
 from app.system.models import Role, User
 from app.system.serializers.roles import RoleDetail
 from app.system.views.auth import get_current_active_user
 from app.system.views.users import validate_user
-from cores.response import ResponseModel
+from cores.m2m import M2MSyncMode, sync_m2m
+from cores.response import FastJSONRoute, ResponseModel
 
-user_role_route = APIRouter()
+user_role_route = APIRouter(route_class=FastJSONRoute)
 
 
 # 获取用户的角色列表
@@ -57,14 +59,15 @@ async def add_role_to_user(user_id: int, role_ids: List[int]):
     user = await validate_user(user_id)
 
     roles = await Role.get_queryset().filter(id__in=role_ids).all()
-    if len(roles) != len(role_ids):
+    if len(roles) != len(set(role_ids)):
         missing_ids = set(role_ids) - {role.id for role in roles}
         raise HTTPException(
             status_code=404,
             detail=f"Roles with IDs {missing_ids} not found",
         )
 
-    await user.roles.add(*roles)
+    await sync_m2m(user.roles, role_ids, M2MSyncMode.ADD)
+    await rebuild_user_permissions(user.id)
     return ResponseModel()
 
 
@@ -89,16 +92,16 @@ async def update_roles_for_user(user_id: int, role_ids: List[int]):
     user = await validate_user(user_id)
 
     roles = await Role.get_queryset().filter(id__in=role_ids).all()
-    if len(roles) != len(role_ids):
+    if len(roles) != len(set(role_ids)):
         missing_ids = set(role_ids) - {role.id for role in roles}
         raise HTTPException(
             status_code=404,
             detail=f"Roles with IDs {missing_ids} not found",
         )
 
-    await user.roles.clear()
-    await user.roles.add(*roles)
+    await sync_m2m(user.roles, role_ids)
 
+    await rebuild_user_permissions(user.id)
     return ResponseModel()
 
 
@@ -123,13 +126,14 @@ async def delete_roles_from_user(user_id: int, role_ids: List[int]):
     user = await validate_user(user_id)
 
     roles = await Role.get_queryset().filter(id__in=role_ids).all()
-    if len(roles) != len(role_ids):
+    if len(roles) != len(set(role_ids)):
         missing_ids = set(role_ids) - {role.id for role in roles}
         raise HTTPException(
             status_code=404,
             detail=f"Roles with IDs {missing_ids} not found",
         )
 
-    await user.roles.remove(*roles)
+    await sync_m2m(user.roles, role_ids, M2MSyncMode.REMOVE)
 
+    await rebuild_user_permissions(user.id)
     return ResponseModel()
@@ -1,9 +1,11 @@
+from fastapi import HTTPException
 from jose import JWTError
 from passlib.exc import InvalidTokenError
 
 from cores.constant.socket import WsMessage, SioEvent
 from cores.jwt import verify_token
 from cores.log import LOG
+from cores.revoke import token_revocation
 from cores.sio import sio
 
 
@@ -14,10 +16,12 @@ async def connect(sid, environ):
     token = token.split("token=")[-1].split("&")[0] if "token=" in token else None
     try:
         payload = verify_token(token)
+        if await token_revocation.is_revoked(payload):
+            raise JWTError("Token revoked")
         username = payload.get("sub")
         LOG.info(f"客户端 {sid = } {username = } 已连接")
         await sio.send("Connection success!", room=sid)
-    except (InvalidTokenError, JWTError):
+    except (InvalidTokenError, JWTError, HTTPException):
         LOG.error(f"客户端 {sid = } {token = } 连接失败")
         await sio.disconnect(sid=sid)
 
@@ -0,0 +1,93 @@
+"""
+登录风暴基准：大量登录请求同时校验密码时，事件循环被阻塞的程度
+
+对比两种方式：
+    blocking  在协程中直接调用 bcrypt（改造前的做法）
+    executor  通过 cores.pwd 的线程池校验（当前做法）
+校验期间每隔 TICK 秒调度一次心跳协程，心跳的延迟即其他请求需要额外等待的时间
+
+    python -m benchmarks.login_storm --logins 200 --rounds 10
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import time
+from pathlib import Path
+from typing import Awaitable, Callable, List
+
+os.environ.setdefault(
+    "CONFIG_FILE_PATH", str(Path(__file__).resolve().parent.parent / "config.ini.example")
+)
+
+from cores import pwd  # noqa: E402
+
+TICK = 0.01
+PASSWORD = "benchmark-password"
+
+
+async def _heartbeat(lags: List[float], stop: asyncio.Event):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append((time.perf_counter() - start - TICK) * 1000)
+
+
+async def _blocking_login(hashed: str, max_pending: int):
+    return pwd.verify_password(PASSWORD, hashed)
+
+
+async def _executor_login(hashed: str, max_pending: int):
+    try:
+        return await pwd.async_verify_and_update(PASSWORD, hashed, max_pending=max_pending)
+    except pwd.PasswordHashBusy:
+        return None
+
+
+async def run(
+    name: str, login: Callable[[str, int], Awaitable], hashed: str, logins: int, max_pending: int
+):
+    lags: List[float] = []
+    stop = asyncio.Event()
+    heartbeat = asyncio.create_task(_heartbeat(lags, stop))
+    # 先让心跳运行起来
+    await asyncio.sleep(TICK)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(login(hashed, max_pending) for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await heartbeat
+
+    lags.sort()
+    rejected = sum(result is None for result in results)
+    print(
+        f"{name:<9} logins={logins} elapsed={elapsed:.2f}s "
+        f"throughput={(logins - rejected) / elapsed:.1f}/s rejected={rejected} "
+        f"loop_lag_ms p50={statistics.median(lags):.1f} "
+        f"p99={lags[int(len(lags) * 0.99)]:.1f} max={lags[-1]:.1f}"
+    )
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--logins", type=int, default=100, help="并发登录数")
+    parser.add_argument("--rounds", type=int, default=10, help="bcrypt cost")
+    parser.add_argument(
+        "--max-pending",
+        type=int,
+        default=None,
+        help="线程池进行中和排队中的任务上限，超出时拒绝（对应 login.max_pending_verifications）",
+    )
+    args = parser.parse_args()
+
+    pwd.apply_rounds(args.rounds)
+    hashed = pwd.get_password_hash(PASSWORD)
+    print(f"bcrypt rounds={args.rounds} workers={pwd.settings.security.pwd_hash_workers}")
+    await run("blocking", _blocking_login, hashed, args.logins, args.max_pending)
+    await run("executor", _executor_login, hashed, args.logins, args.max_pending)
+    pwd.shutdown_hash_executor()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
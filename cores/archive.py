@@ -0,0 +1,216 @@
+import asyncio
+import time
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple, Type
+
+from pypika import Table
+from redis.exceptions import RedisError
+from tortoise import connections, timezone
+from tortoise.expressions import Subquery
+from tortoise.fields.relational import BackwardFKRelation
+from tortoise.queryset import QuerySet
+from tortoise.transactions import in_transaction
+
+from app.system.models import Menu, Permission, Role, User
+from cores.config import ArchiveConfig, settings
+from cores.db_router import replica_set
+from cores.log import LOG
+from cores.metrics import register_metrics
+from cores.model import PRIMARY_CONNECTION, Model
+from cores.redis import ASYNC_REDIS
+
+# 多个 worker 中只有拿到锁的一个执行本轮归档
+ARCHIVE_LOCK_KEY = "archive:lock"
+# 归档表名后缀，表结构与原表相同，另有 archived_at 列
+ARCHIVE_TABLE_SUFFIX = "_archive"
+# 复制延迟过大时，重新检查延迟的间隔（秒）
+LAG_RECHECK_INTERVAL = 1
+# 查询复制状态的语句和延迟列：MySQL 8.0.22 起为 SHOW REPLICA STATUS，
+# 旧版本（及 MariaDB 10.5 之前）只支持 SHOW SLAVE STATUS
+REPLICA_STATUS_QUERIES = (
+    ("SHOW REPLICA STATUS", "Seconds_Behind_Source"),
+    ("SHOW SLAVE STATUS", "Seconds_Behind_Master"),
+)
+# 归档时置空而不是阻止归档的外键，其余仍引用待归档行的外键（如菜单的 parent）会使该行暂不归档
+NULLIFY_ON_ARCHIVE = {"creator_id"}
+
+
+class Archiver:
+    """
+    软删除数据归档
+
+    把删除超过保留期的行分批移到归档表，每批一个事务；批次之间暂停，
+    只读副本复制延迟过大时等待，避免长事务和大量 binlog 影响主库与副本
+    """
+
+    def __init__(self, models: List[Type[Model]], config: ArchiveConfig):
+        self.models = models
+        self.config = config
+        self._task: Optional[asyncio.Task] = None
+        self.archived: Dict[str, int] = {model._meta.db_table: 0 for model in models}
+        self.runs = 0
+        self.batches = 0
+        self.lag_pauses = 0
+        self.last_run_at: Optional[float] = None
+        self.last_run_seconds: Optional[float] = None
+        # 各副本上可用的复制状态查询
+        self._status_queries: Dict[str, Tuple[str, str]] = {}
+
+    async def start(self):
+        if self.config.enabled:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.config.interval)
+            try:
+                if await self._acquire_lock():
+                    await self.run_once()
+            except Exception as e:
+                LOG.exception(e)
+
+    async def _acquire_lock(self) -> bool:
+        try:
+            return bool(
+                await ASYNC_REDIS.set(ARCHIVE_LOCK_KEY, 1, ex=self.config.interval, nx=True)
+            )
+        except RedisError as e:
+            # 无法确认是否有其他 worker 在执行，跳过本轮
+            LOG.warning(f"Skipping archive run, failed to acquire lock: {e!r}")
+            return False
+
+    async def run_once(self) -> int:
+        """
+        归档所有模型中删除时间早于保留期的行，返回归档的行数
+        """
+        start = time.monotonic()
+        cutoff = timezone.now() - timedelta(days=self.config.retention_days)
+        total = 0
+        for model in self.models:
+            while True:
+                await self._wait_for_replicas()
+                count = await self.archive_batch(model, cutoff)
+                total += count
+                if count < self.config.batch_size:
+                    break
+                await asyncio.sleep(self.config.batch_interval)
+
+        self.runs += 1
+        self.last_run_at = time.time()
+        self.last_run_seconds = time.monotonic() - start
+        if total:
+            LOG.info(f"Archived {total} soft-deleted rows in {self.last_run_seconds:.1f}s.")
+        return total
+
+    @staticmethod
+    def _archivable(model: Type[Model], cutoff) -> QuerySet:
+        queryset = model.filter(deleted_at__lt=cutoff)
+        meta = model._meta
+        for name in meta.backward_fk_fields:
+            relation: BackwardFKRelation = meta.fields_map[name]
+            if relation.relation_field in NULLIFY_ON_ARCHIVE:
+                continue
+            # 仍被其他行引用，删除会级联删除引用的行
+            referenced = relation.related_model.filter(
+                **{f"{relation.relation_field}__isnull": False}
+            ).values(relation.relation_field)
+            queryset = queryset.exclude(id__in=Subquery(referenced))
+        return queryset
+
+    async def archive_batch(self, model: Type[Model], cutoff) -> int:
+        """
+        在一个事务内把一批行复制到归档表后从原表删除，返回本批的行数
+        """
+        meta = model._meta
+        columns = sorted(meta.db_fields)
+        async with in_transaction(PRIMARY_CONNECTION) as conn:
+            # values_list 不支持 FOR UPDATE，只取 id 列锁定本批的行
+            rows = await (
+                self._archivable(model, cutoff)
+                .using_db(conn)
+                .select_for_update()
+                .order_by("id")
+                .limit(self.config.batch_size)
+                .only("id")
+            )
+            if not rows:
+                return 0
+            ids = [row.id for row in rows]
+
+            for name in meta.backward_fk_fields:
+                relation: BackwardFKRelation = meta.fields_map[name]
+                if relation.relation_field in NULLIFY_ON_ARCHIVE:
+                    await relation.related_model.filter(
+                        **{f"{relation.relation_field}__in": ids}
+                    ).using_db(conn).update(**{relation.relation_field: None})
+
+            source = Table(meta.db_table)
+            query = (
+                conn.query_class.into(Table(f"{meta.db_table}{ARCHIVE_TABLE_SUFFIX}"))
+                .columns(*columns)
+                .from_(source)
+                .select(*columns)
+                .where(source.id.isin(ids))
+            )
+            await conn.execute_query(query.get_sql())
+            # 多对多关联表中的记录随外键级联删除
+            await model.filter(id__in=ids).using_db(conn).delete()
+
+        self.batches += 1
+        self.archived[meta.db_table] += len(ids)
+        return len(ids)
+
+    async def _replica_lag(self, name: str) -> Optional[float]:
+        """
+        单个只读副本的复制延迟（秒），依次尝试 REPLICA_STATUS_QUERIES，记住可用的语句
+        """
+        conn = connections.get(name)
+        known = self._status_queries.get(name)
+        error = None
+        for statement, column in (known,) if known else REPLICA_STATUS_QUERIES:
+            try:
+                _, rows = await conn.execute_query(statement)
+            except Exception as e:
+                error = e
+                continue
+            self._status_queries[name] = (statement, column)
+            return max((row[column] for row in rows if row.get(column) is not None), default=None)
+        # 已记住的语句失败时，下次重新依次尝试
+        self._status_queries.pop(name, None)
+        LOG.warning(f"Failed to check replication lag of {name}: {error!r}")
+        return None
+
+    async def _replication_lag(self) -> Optional[float]:
+        """
+        各只读副本中最大的复制延迟（秒），没有副本或无法获取时返回 None
+        """
+        lags = [await self._replica_lag(name) for name in replica_set.names]
+        return max((lag for lag in lags if lag is not None), default=None)
+
+    async def _wait_for_replicas(self):
+        while (lag := await self._replication_lag()) is not None:
+            if lag <= self.config.max_replication_lag:
+                return
+            self.lag_pauses += 1
+            LOG.info(f"Replication lag {lag}s is too high, pausing archive.")
+            await asyncio.sleep(LAG_RECHECK_INTERVAL)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.config.enabled,
+            "runs": self.runs,
+            "batches": self.batches,
+            "archived": dict(self.archived),
+            "lag_pauses": self.lag_pauses,
+            "last_run_at": self.last_run_at,
+            "last_run_seconds": self.last_run_seconds,
+        }
+
+
+archiver = Archiver([User, Role, Permission, Menu], settings.archive)
+register_metrics("archive", archiver.stats)
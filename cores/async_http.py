@@ -1,13 +1,231 @@
+import asyncio
+import importlib.util
+import random
+import time
 from typing import IO, Any, Dict, Mapping, Optional, Union
 from urllib.parse import parse_qs
 
 import httpx
 from httpx import Response
+from starlette import status
 
+from cores.config import HttpConfig, settings
 from cores.log import LOG
+from cores.metrics import Histogram, register_metrics
+
+# 幂等的请求方法，默认允许重试
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+# 可重试的响应状态码
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class HttpRequestError(Exception):
+    """
+    对外 HTTP 请求失败，status_code 为调用方应返回给客户端的状态码
+    """
+
+    status_code = status.HTTP_502_BAD_GATEWAY
+
+    def __init__(self, url: str, message: str):
+        super().__init__(f"{message}: {url}")
+        self.url = url
+
+
+class UpstreamBadResponse(HttpRequestError):
+    """上游返回了非 2xx 响应"""
+
+    def __init__(self, url: str, response: Response):
+        super().__init__(url, f"Upstream responded {response.status_code}")
+        self.response = response
+
+
+class UpstreamUnavailable(HttpRequestError):
+    """无法连接上游，或上游的熔断器处于打开状态"""
+
+    status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+
+
+class UpstreamTimeout(HttpRequestError):
+    """请求超时或超出整体截止时间"""
+
+    status_code = status.HTTP_504_GATEWAY_TIMEOUT
+
+
+class CircuitBreaker:
+    """
+    单个上游主机的熔断器
+
+    连续失败达到阈值后打开，打开期间的请求直接失败；reset_timeout 秒后半开，
+    只放行一个探测请求，成功则关闭，失败则重新打开
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        # 半开状态下探测请求的发出时间，探测请求被取消时超过 reset_timeout 后允许再次探测
+        self._probe_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        if self.state == self.OPEN:
+            if time.monotonic() - self.opened_at < self.reset_timeout:
+                return False
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            now = time.monotonic()
+            if self._probe_at is not None and now - self._probe_at < self.reset_timeout:
+                return False
+            self._probe_at = now
+        return True
+
+    def record_success(self):
+        self.state = self.CLOSED
+        self.failures = 0
+        self._probe_at = None
+
+    def record_failure(self):
+        self.failures += 1
+        self._probe_at = None
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                LOG.warning(f"Circuit opened after {self.failures} consecutive failures.")
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+
+
+class HostStats:
+    """
+    单个上游主机的请求统计
+    """
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.status_codes: Dict[str, int] = {}
+        self.errors: Dict[str, int] = {}
+        self.requests = 0
+        self.retries = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+    def record(self, duration_ms: float, request: Optional[httpx.Request], outcome: str):
+        """
+        :param outcome: 响应状态码，或失败时的错误类型
+        """
+        self.requests += 1
+        self.latency.observe(duration_ms)
+        counter = self.status_codes if outcome.isdigit() else self.errors
+        counter[outcome] = counter.get(outcome, 0) + 1
+        if request is not None:
+            self.bytes_sent += int(request.headers.get("content-length", 0))
+
+    def snapshot(self) -> dict:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "latency_ms": self.latency.snapshot(),
+        }
+
+
+class HttpClientRegistry:
+    """
+    共享的 httpx.AsyncClient，按目标主机（scheme + host + port）各建一个，
+    连接池保持长连接，且每个主机的连接数、熔断状态相互独立
+    """
+
+    def __init__(self, config: HttpConfig):
+        self.config = config
+        self.http2 = config.http2 and importlib.util.find_spec("h2") is not None
+        if config.http2 and not self.http2:
+            LOG.warning("HTTP/2 is enabled but h2 is not installed, falling back to HTTP/1.1.")
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._stats: Dict[str, HostStats] = {}
+
+    @staticmethod
+    def origin(url: Union[str, httpx.URL]) -> str:
+        url = httpx.URL(url)
+        return f"{url.scheme}://{url.netloc.decode('ascii')}"
+
+    def _create_client(self) -> httpx.AsyncClient:
+        return httpx.AsyncClient(
+            http2=self.http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections_per_host,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=self.config.connect_timeout,
+                read=self.config.read_timeout,
+                write=self.config.write_timeout,
+                pool=self.config.pool_timeout,
+            ),
+        )
+
+    def get(self, url: Union[str, httpx.URL]) -> httpx.AsyncClient:
+        """
+        获取目标地址所在主机的客户端，不存在时创建
+        """
+        origin = self.origin(url)
+        client = self._clients.get(origin)
+        if client is None or client.is_closed:
+            client = self._clients[origin] = self._create_client()
+        return client
+
+    def breaker(self, url: Union[str, httpx.URL]) -> CircuitBreaker:
+        origin = self.origin(url)
+        breaker = self._breakers.get(origin)
+        if breaker is None:
+            breaker = self._breakers[origin] = CircuitBreaker(
+                self.config.breaker_failure_threshold, self.config.breaker_reset_timeout
+            )
+        return breaker
+
+    def host_stats(self, url: Union[str, httpx.URL]) -> HostStats:
+        origin = self.origin(url)
+        stats = self._stats.get(origin)
+        if stats is None:
+            stats = self._stats[origin] = HostStats()
+        return stats
+
+    async def aclose(self):
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    def stats(self) -> dict:
+        hosts = {}
+        for origin, stats in self._stats.items():
+            breaker = self.breaker(origin)
+            hosts[origin] = {
+                **stats.snapshot(),
+                "breaker": {"state": breaker.state, "failures": breaker.failures},
+            }
+        return {"http2": self.http2, "hosts": hosts}
+
+
+http_clients = HttpClientRegistry(settings.http)
+register_metrics("http_clients", http_clients.stats)
 
 
 def _log_response(response: Response):
+    """
+    记录响应内容，仅在开启 log_bodies 时按 body_log_sample_rate 抽样，避免每次都解析响应体
+    """
+    config = settings.http
+    if not config.log_bodies or random.random() >= config.body_log_sample_rate:
+        return
+
     content_type = response.headers.get("content-type", "")
     if "json" in content_type:
         LOG.debug(f"HTTP response JSON: {response.json()}")
@@ -18,6 +236,70 @@ def _log_response(response: Response):
         LOG.debug(f"HTTP response content: {response.content}")
 
 
+def _elapsed_ms(start: float) -> float:
+    return (time.perf_counter() - start) * 1000
+
+
+def _error_request(error: Exception) -> Optional[httpx.Request]:
+    # 请求未构建完成（如 asyncio 超时）时没有关联的 request
+    try:
+        return error.request
+    except (AttributeError, RuntimeError):
+        return None
+
+
+def _backoff(attempt: int) -> float:
+    """
+    指数退避，使用 full jitter 打散并发重试
+    """
+    config = settings.http
+    return random.uniform(0, min(config.retry_backoff_max, config.retry_backoff * 2**attempt))
+
+
+async def _attempt(
+    client: httpx.AsyncClient,
+    breaker: CircuitBreaker,
+    stats: HostStats,
+    method: str,
+    url: str,
+    remaining: float,
+    **kwargs,
+) -> Union[Response, HttpRequestError]:
+    """
+    发送一次请求，记录统计并更新熔断状态
+    :param remaining: 距整体截止时间的剩余秒数
+    :return: 成功时返回响应，可重试的失败返回对应的异常，不可重试的失败直接抛出
+    """
+    start = time.perf_counter()
+    try:
+        response = await asyncio.wait_for(client.request(method, url, **kwargs), remaining)
+    except (httpx.TimeoutException, asyncio.TimeoutError) as e:
+        stats.record(_elapsed_ms(start), _error_request(e), "timeout")
+        LOG.warning(f"HTTP {method} {url} timed out: {e!r}")
+        breaker.record_failure()
+        return UpstreamTimeout(url, "Upstream timed out")
+    except httpx.TransportError as e:
+        stats.record(_elapsed_ms(start), _error_request(e), type(e).__name__)
+        LOG.warning(f"HTTP {method} {url} failed: {e!r}")
+        breaker.record_failure()
+        return UpstreamUnavailable(url, "Upstream unreachable")
+
+    stats.record(_elapsed_ms(start), response.request, str(response.status_code))
+    stats.bytes_received += response.num_bytes_downloaded
+    # 4xx 说明上游可用，只有 5xx 计入熔断
+    if response.status_code < 500:
+        breaker.record_success()
+    else:
+        breaker.record_failure()
+    if response.is_success:
+        _log_response(response)
+        return response
+    error = UpstreamBadResponse(url, response)
+    if response.status_code not in RETRY_STATUS_CODES:
+        raise error
+    return error
+
+
 async def async_http_request(
     url: str,
     method: str = "GET",
@@ -27,21 +309,56 @@ async def async_http_request(
     json: Optional[Dict[str, Any]] = None,
     files: Optional[Mapping[str, Union[IO[bytes], bytes, str]]] = None,
     timeout: Optional[float] = None,
+    deadline: Optional[float] = None,
+    retries: Optional[int] = None,
 ) -> Response:
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.request(
-                method,
-                url,
-                headers=headers,
-                params=params,
-                json=json,
-                files=files,
-                data=data,
-                timeout=timeout,
-            )
-            response.raise_for_status()
-            _log_response(response)
-            return response
-        except httpx.HTTPError as e:
-            LOG.exception(e)
+    """
+    发送请求，失败时抛出 HttpRequestError 的子类
+    :param timeout: 单次尝试的超时（秒），未指定时使用 [http] 中配置的超时
+    :param deadline: 包含重试在内的整体截止时间（秒），未指定时使用配置的 deadline
+    :param retries: 最大重试次数，未指定时幂等请求使用配置的 retries，非幂等请求不重试
+    """
+    config = settings.http
+    method = method.upper()
+    if retries is None:
+        retries = config.retries if method in IDEMPOTENT_METHODS else 0
+    expire_at = time.monotonic() + (config.deadline if deadline is None else deadline)
+
+    client = http_clients.get(url)
+    breaker = http_clients.breaker(url)
+    stats = http_clients.host_stats(url)
+    attempt = 0
+    while True:
+        if not breaker.allow():
+            raise UpstreamUnavailable(url, "Circuit open")
+
+        remaining = expire_at - time.monotonic()
+        if remaining <= 0:
+            raise UpstreamTimeout(url, "Deadline exceeded")
+
+        result = await _attempt(
+            client,
+            breaker,
+            stats,
+            method,
+            url,
+            remaining,
+            headers=headers,
+            params=params,
+            json=json,
+            files=files,
+            data=data,
+            timeout=httpx.USE_CLIENT_DEFAULT if timeout is None else timeout,
+        )
+        if isinstance(result, Response):
+            return result
+
+        if attempt >= retries:
+            raise result
+        delay = _backoff(attempt)
+        if time.monotonic() + delay >= expire_at:
+            raise result
+        attempt += 1
+        stats.retries += 1
+        LOG.info(f"Retrying HTTP {method} {url} in {delay:.2f}s (attempt {attempt}/{retries}).")
+        await asyncio.sleep(delay)
@@ -0,0 +1,189 @@
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from fastapi import HTTPException, Query
+from pydantic import BaseModel
+from starlette import status
+from tortoise import timezone
+from tortoise.queryset import QuerySet
+
+from cores.db_router import primary_transaction
+from cores.model import Model
+
+MODEL = TypeVar("MODEL", bound=Model)
+
+# 单次批量操作的最大条数
+MAX_BULK_SIZE = 1000
+
+
+class BulkItemError(BaseModel):
+    # 出错的条目在请求中的下标
+    index: int
+    field: Optional[str] = None
+    msg: str
+
+
+def bulk_error(errors: List[BulkItemError]) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+        detail=[error.model_dump() for error in errors],
+    )
+
+
+@dataclass
+class IdsParams:
+    ids: List[int] = Query(
+        None,
+        alias="ids",
+        max_length=MAX_BULK_SIZE,
+        description="按 id 批量获取，多个 id 重复传参：?ids=1&ids=2",
+    )
+
+    def apply(self, queryset: QuerySet[MODEL], pagination=None) -> QuerySet[MODEL]:
+        if not self.ids:
+            return queryset
+        if pagination is not None:
+            # 按 id 批量获取时一页返回全部
+            pagination.page = 1
+            pagination.limit = max(pagination.limit, len(self.ids))
+        return queryset.filter(id__in=self.ids)
+
+
+def unique_fields(model: Type[Model]) -> List[str]:
+    meta = model._meta
+    return [
+        name for name in meta.db_fields if (field := meta.fields_map[name]).unique and not field.pk
+    ]
+
+
+async def find_unique_conflicts(
+    model: Type[Model], items: List[Dict[str, Any]], ids: Optional[List[int]] = None
+) -> List[BulkItemError]:
+    """
+    检查唯一字段在批次内是否重复，以及是否与已有数据冲突（已软删除的数据同样受唯一约束限制）
+    :param ids: 批量更新时各条目对应的 id，与自身的原值不算冲突
+    """
+    errors = []
+    for field in unique_fields(model):
+        seen: Dict[Any, int] = {}
+        for index, item in enumerate(items):
+            if (value := item.get(field)) is None:
+                continue
+            if value in seen:
+                errors.append(
+                    BulkItemError(
+                        index=index,
+                        field=field,
+                        msg=f"Duplicate {field} {value!r}, same as item {seen[value]}",
+                    )
+                )
+            else:
+                seen[value] = index
+        if not seen:
+            continue
+
+        existing = dict(await model.filter(**{f"{field}__in": list(seen)}).values_list(field, "id"))
+        for value, index in seen.items():
+            owner = existing.get(value)
+            if owner is not None and (ids is None or owner != ids[index]):
+                errors.append(
+                    BulkItemError(index=index, field=field, msg=f"{field} {value!r} already exists")
+                )
+    return sorted(errors, key=lambda error: error.index)
+
+
+def _missing(model: Type[Model], ids: List[int], found: Dict[int, Model]) -> List[BulkItemError]:
+    errors = []
+    seen = set()
+    for index, obj_id in enumerate(ids):
+        if obj_id in seen:
+            errors.append(BulkItemError(index=index, field="id", msg=f"Duplicate id {obj_id}"))
+        elif obj_id not in found:
+            errors.append(
+                BulkItemError(index=index, field="id", msg=f"{model.__name__} {obj_id} not found")
+            )
+        seen.add(obj_id)
+    return errors
+
+
+def _null_values(model: Type[Model], items: List[Dict[str, Any]]) -> List[BulkItemError]:
+    fields_map = model._meta.fields_map
+    return [
+        BulkItemError(index=index, field=name, msg=f"{name} may not be null")
+        for index, values in enumerate(items)
+        for name, value in values.items()
+        if value is None and (field := fields_map.get(name)) is not None and not field.null
+    ]
+
+
+async def bulk_create(model: Type[MODEL], items: List[Dict[str, Any]], **extra) -> List[MODEL]:
+    """
+    在一个事务内批量创建，任一条目校验失败时全部不创建，按请求顺序返回创建的对象
+    :param extra: 所有条目共用的字段，如 creator_id
+    """
+    # MySQL 批量插入不返回自增 id，创建后按唯一字段查回
+    key = unique_fields(model)[0]
+    async with primary_transaction() as conn:
+        if errors := await find_unique_conflicts(model, items):
+            raise bulk_error(errors)
+        await model.bulk_create([model(**item, **extra) for item in items], using_db=conn)
+        queryset = model.filter(**{f"{key}__in": [item[key] for item in items]}).using_db(conn)
+        created = {getattr(obj, key): obj for obj in await queryset}
+    return [created[item[key]] for item in items]
+
+
+async def bulk_update(
+    model: Type[MODEL], items: List[Tuple[int, Dict[str, Any]]]
+) -> Tuple[List[MODEL], Dict[int, Dict[str, Any]]]:
+    """
+    在一个事务内批量更新，多行合并为一条 UPDATE ... CASE 语句；任一条目校验失败时全部不更新
+    :param items: (id, 要更新的字段) 列表
+    :return: (按请求顺序更新后的对象, {id: 更新前被修改字段的原值})
+    """
+    ids = [obj_id for obj_id, _ in items]
+    async with primary_transaction() as conn:
+        found = {
+            obj.id: obj
+            for obj in await model.get_queryset()
+            .filter(id__in=ids)
+            .using_db(conn)
+            .select_for_update()
+        }
+        values_list = [values for _, values in items]
+        errors = _missing(model, ids, found) + _null_values(model, values_list)
+        errors += await find_unique_conflicts(model, values_list, ids)
+        if errors:
+            raise bulk_error(sorted(errors, key=lambda error: error.index))
+
+        fields = set()
+        previous: Dict[int, Dict[str, Any]] = {}
+        now = timezone.now()
+        for obj_id, values in items:
+            obj = found[obj_id]
+            previous[obj_id] = {name: getattr(obj, name) for name in values}
+            obj.update_from_dict(values)
+            obj.updated_at = now
+            fields.update(values)
+        if fields:
+            await model.bulk_update(
+                [found[obj_id] for obj_id in ids], fields=[*fields, "updated_at"], using_db=conn
+            )
+    return [found[obj_id] for obj_id in ids], previous
+
+
+async def bulk_soft_delete(model: Type[MODEL], ids: List[int]) -> List[MODEL]:
+    """
+    在一个事务内批量软删除，任一 id 不存在时全部不删除，返回被删除的对象
+    """
+    async with primary_transaction() as conn:
+        found = {
+            obj.id: obj
+            for obj in await model.get_queryset()
+            .filter(id__in=ids)
+            .using_db(conn)
+            .select_for_update()
+        }
+        if errors := _missing(model, ids, found):
+            raise bulk_error(errors)
+        await model.get_queryset().filter(id__in=ids).using_db(conn).soft_delete()
+    return list(found.values())
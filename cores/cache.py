@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from ghkit.cache import Cache
+
+
+class LRUCache(Cache):
+    """
+    进程内的 LRU 缓存，支持按条目过期，并统计命中/未命中次数
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        self._cache: "OrderedDict[Hashable, tuple[Any, Optional[float]]]" = OrderedDict()
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        item = self._cache.get(key)
+        if item is None:
+            self.misses += 1
+            return None
+
+        value, expire_at = item
+        if expire_at is not None and time.time() >= expire_at:
+            del self._cache[key]
+            self.misses += 1
+            return None
+
+        self._cache.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, ttl=None, expire_at: Optional[float] = None):
+        """
+        写入缓存
+        :param ttl: 存活秒数，未指定时使用默认 ttl
+        :param expire_at: 绝对过期时间戳，优先于 ttl
+        """
+        if expire_at is None and (ttl := ttl or self.ttl):
+            expire_at = time.time() + ttl
+
+        self._cache[key] = (value, expire_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def delete(self, key):
+        self._cache.pop(key, None)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
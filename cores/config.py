@@ -1,6 +1,7 @@
 import configparser
 import os
-from dataclasses import dataclass
+from dataclasses import dataclass, field, replace
+from typing import List
 
 
 @dataclass
@@ -20,6 +21,14 @@ class MySQLConfig:
     user: str
     password: str
     database: str
+    # 连接池大小，启动时预先建立 minsize 个连接
+    minsize: int = 1
+    maxsize: int = 10
+    connect_timeout: int = 15
+    # 空闲超过该秒数的连接在下次取用时重建，-1 表示不回收
+    pool_recycle: int = 3600
+    # 空闲连接健康检查的间隔（秒），0 表示不检查
+    health_check_interval: int = 30
 
     @property
     def db_url(self):
@@ -27,7 +36,9 @@ class MySQLConfig:
 
     @property
     def db_url_pymysql(self):
-        return f'mysql+pymysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}'
+        return (
+            f"mysql+pymysql://{self.user}:{self.password}@{self.host}:{self.port}/{self.database}"
+        )
 
 
 @dataclass
@@ -47,6 +58,13 @@ class SecurityConfig:
     secret_key: str
     algorithm: str
     token_expire_days: int
+    token_cache_size: int = 10000
+    pwd_hash_workers: int = 4
+    revoked_bloom_capacity: int = 100000
+    # bcrypt cost 按目标校验耗时（毫秒）在 [pwd_min_rounds, pwd_max_rounds] 内校准
+    pwd_verify_target_ms: int = 250
+    pwd_min_rounds: int = 10
+    pwd_max_rounds: int = 14
 
 
 @dataclass
@@ -55,6 +73,57 @@ class GithubOAuthConfig:
     secret: str
 
 
+@dataclass
+class LoginConfig:
+    # 同一用户名、同一 IP 在滑动窗口内允许的登录次数
+    username_limit: int = 10
+    username_window: int = 60
+    ip_limit: int = 50
+    ip_window: int = 60
+    # 每个 worker 同时进行（含排队）的密码校验上限，超出直接返回 429
+    max_pending_verifications: int = 16
+
+
+@dataclass
+class HttpConfig:
+    # 每个目标主机一个连接池
+    max_connections_per_host: int = 20
+    max_keepalive_connections: int = 10
+    keepalive_expiry: float = 30.0
+    # 超时，单位秒
+    connect_timeout: float = 5.0
+    read_timeout: float = 10.0
+    write_timeout: float = 10.0
+    pool_timeout: float = 5.0
+    # 需要安装 h2，未安装时忽略
+    http2: bool = False
+    # 包含重试在内的整体截止时间（秒），以及幂等请求的重试次数和指数退避参数
+    deadline: float = 15.0
+    retries: int = 2
+    retry_backoff: float = 0.2
+    retry_backoff_max: float = 2.0
+    # 同一主机连续失败多少次后熔断，以及熔断多少秒后放行探测请求
+    breaker_failure_threshold: int = 5
+    breaker_reset_timeout: float = 30.0
+    # 是否记录响应内容，开启后按比例抽样记录
+    log_bodies: bool = False
+    body_log_sample_rate: float = 0.1
+
+
+@dataclass
+class ArchiveConfig:
+    # 是否定期把软删除超过保留期的数据移到归档表，需要先执行迁移创建归档表，默认关闭
+    enabled: bool = False
+    retention_days: int = 30
+    # 两轮归档之间的间隔（秒）
+    interval: int = 3600
+    # 每批移动的行数，每批一个事务，批次之间暂停 batch_interval 秒
+    batch_size: int = 500
+    batch_interval: float = 0.5
+    # 只读副本的复制延迟（秒）超过该值时暂停归档
+    max_replication_lag: float = 5.0
+
+
 @dataclass
 class Settings:
     app: AppConfig
@@ -62,6 +131,10 @@ class Settings:
     redis: RedisConfig
     security: SecurityConfig
     github: GithubOAuthConfig
+    login: LoginConfig = field(default_factory=LoginConfig)
+    http: HttpConfig = field(default_factory=HttpConfig)
+    archive: ArchiveConfig = field(default_factory=ArchiveConfig)
+    mysql_replicas: List[MySQLConfig] = field(default_factory=list)
 
 
 def get_config_path() -> str:
@@ -88,18 +161,115 @@ def read_config() -> Settings:
     app_config.port = config.getint("app", "port")
 
     mysql_config = MySQLConfig(**config["mysql"])
+    mysql_config.minsize = config.getint("mysql", "minsize", fallback=1)
+    mysql_config.maxsize = config.getint("mysql", "maxsize", fallback=10)
+    mysql_config.connect_timeout = config.getint("mysql", "connect_timeout", fallback=15)
+    mysql_config.pool_recycle = config.getint("mysql", "pool_recycle", fallback=3600)
+    mysql_config.health_check_interval = config.getint(
+        "mysql", "health_check_interval", fallback=30
+    )
+    # 只读副本：[mysql_replica_*] 节，未填写的项沿用主库的配置
+    mysql_replicas = []
+    for section in config.sections():
+        if not section.startswith("mysql_replica"):
+            continue
+        replica_config = replace(mysql_config, **config[section])
+        for key in ("minsize", "maxsize", "connect_timeout", "pool_recycle"):
+            setattr(
+                replica_config,
+                key,
+                config.getint(section, key, fallback=getattr(mysql_config, key)),
+            )
+        mysql_replicas.append(replica_config)
+
     redis_config = RedisConfig(**config["redis"])
     security_config = SecurityConfig(**config["security"])
     security_config.token_expire_days = config.getint("security", "token_expire_days")
+    security_config.token_cache_size = config.getint("security", "token_cache_size", fallback=10000)
+    security_config.pwd_hash_workers = config.getint("security", "pwd_hash_workers", fallback=4)
+    security_config.revoked_bloom_capacity = config.getint(
+        "security", "revoked_bloom_capacity", fallback=100000
+    )
+    security_config.pwd_verify_target_ms = config.getint(
+        "security", "pwd_verify_target_ms", fallback=250
+    )
+    security_config.pwd_min_rounds = config.getint("security", "pwd_min_rounds", fallback=10)
+    security_config.pwd_max_rounds = config.getint("security", "pwd_max_rounds", fallback=14)
 
     github_oauth_config = GithubOAuthConfig(**config["github"])
 
+    login_config = LoginConfig()
+    if config.has_section("login"):
+        login_config = LoginConfig(**{key: config.getint("login", key) for key in config["login"]})
+
+    http_config = HttpConfig()
+    if config.has_section("http"):
+        http_config = HttpConfig(
+            max_connections_per_host=config.getint(
+                "http", "max_connections_per_host", fallback=http_config.max_connections_per_host
+            ),
+            max_keepalive_connections=config.getint(
+                "http", "max_keepalive_connections", fallback=http_config.max_keepalive_connections
+            ),
+            keepalive_expiry=config.getfloat(
+                "http", "keepalive_expiry", fallback=http_config.keepalive_expiry
+            ),
+            connect_timeout=config.getfloat(
+                "http", "connect_timeout", fallback=http_config.connect_timeout
+            ),
+            read_timeout=config.getfloat("http", "read_timeout", fallback=http_config.read_timeout),
+            write_timeout=config.getfloat(
+                "http", "write_timeout", fallback=http_config.write_timeout
+            ),
+            pool_timeout=config.getfloat("http", "pool_timeout", fallback=http_config.pool_timeout),
+            http2=config.getboolean("http", "http2", fallback=http_config.http2),
+            deadline=config.getfloat("http", "deadline", fallback=http_config.deadline),
+            retries=config.getint("http", "retries", fallback=http_config.retries),
+            retry_backoff=config.getfloat(
+                "http", "retry_backoff", fallback=http_config.retry_backoff
+            ),
+            retry_backoff_max=config.getfloat(
+                "http", "retry_backoff_max", fallback=http_config.retry_backoff_max
+            ),
+            breaker_failure_threshold=config.getint(
+                "http", "breaker_failure_threshold", fallback=http_config.breaker_failure_threshold
+            ),
+            breaker_reset_timeout=config.getfloat(
+                "http", "breaker_reset_timeout", fallback=http_config.breaker_reset_timeout
+            ),
+            log_bodies=config.getboolean("http", "log_bodies", fallback=http_config.log_bodies),
+            body_log_sample_rate=config.getfloat(
+                "http", "body_log_sample_rate", fallback=http_config.body_log_sample_rate
+            ),
+        )
+
+    archive_config = ArchiveConfig()
+    if config.has_section("archive"):
+        archive_config = ArchiveConfig(
+            enabled=config.getboolean("archive", "enabled", fallback=archive_config.enabled),
+            retention_days=config.getint(
+                "archive", "retention_days", fallback=archive_config.retention_days
+            ),
+            interval=config.getint("archive", "interval", fallback=archive_config.interval),
+            batch_size=config.getint("archive", "batch_size", fallback=archive_config.batch_size),
+            batch_interval=config.getfloat(
+                "archive", "batch_interval", fallback=archive_config.batch_interval
+            ),
+            max_replication_lag=config.getfloat(
+                "archive", "max_replication_lag", fallback=archive_config.max_replication_lag
+            ),
+        )
+
     return Settings(
         app=app_config,
         mysql=mysql_config,
         redis=redis_config,
         security=security_config,
         github=github_oauth_config,
+        login=login_config,
+        http=http_config,
+        archive=archive_config,
+        mysql_replicas=mysql_replicas,
     )
 
 
@@ -0,0 +1,153 @@
+import asyncio
+import time
+from typing import Dict, Optional
+
+from tortoise import connections
+from tortoise.exceptions import DBConnectionError
+
+from cores.config import settings
+from cores.log import LOG
+from cores.metrics import Histogram, register_metrics
+
+
+class PoolMonitor:
+    """
+    单个数据库连接的 aiomysql 连接池监控：统计取连接的排队数和耗时，并定期检查空闲连接
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.pool = None
+        self._acquire = None
+        self.waiting = 0
+        self.acquire_latency = Histogram()
+        self.health_checks = 0
+        self.health_check_failures = 0
+
+    def attach(self, pool):
+        """
+        包装连接池的 _acquire，连接池重建后需要重新调用
+        """
+        if pool is self.pool:
+            return
+        self.pool = pool
+        acquire = self._acquire = pool._acquire
+
+        async def _acquire():
+            self.waiting += 1
+            start = time.perf_counter()
+            try:
+                return await acquire()
+            finally:
+                self.waiting -= 1
+                self.acquire_latency.observe((time.perf_counter() - start) * 1000)
+
+        pool._acquire = _acquire
+
+    async def check_idle_connections(self):
+        """
+        逐个 ping 空闲连接，关闭失效的连接后补足到 minsize
+        """
+        pool = self.pool
+        if pool is None or pool.closed or self.waiting:
+            return
+
+        # 取出的连接归还时追加到队尾，循环 freesize 次即可依次检查每个空闲连接
+        for _ in range(pool.freesize):
+            if self.waiting or not pool.freesize:
+                break
+            # 使用原始的 _acquire，健康检查不计入取连接的统计
+            conn = await self._acquire()
+            try:
+                self.health_checks += 1
+                await conn.ping(reconnect=False)
+            except Exception as e:
+                self.health_check_failures += 1
+                LOG.warning(f"Closing broken connection in pool {self.name}: {e!r}")
+                conn.close()
+            finally:
+                pool.release(conn)
+
+        async with pool._cond:
+            await pool._fill_free_pool(False)
+
+    def stats(self) -> dict:
+        pool = self.pool
+        if pool is None:
+            return {}
+        return {
+            "size": pool.size,
+            "minsize": pool.minsize,
+            "maxsize": pool.maxsize,
+            "in_use": len(pool._used),
+            "idle": pool.freesize,
+            "waiting": self.waiting,
+            "acquire_latency_ms": self.acquire_latency.snapshot(),
+            "health_checks": self.health_checks,
+            "health_check_failures": self.health_check_failures,
+        }
+
+
+class PoolManager:
+    """
+    管理所有 MySQL 连接的连接池：启动时预热，运行中定期健康检查
+    """
+
+    def __init__(self, health_check_interval: int):
+        self.health_check_interval = health_check_interval
+        self.monitors: Dict[str, PoolMonitor] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def _attach_all(self):
+        for client in connections.all():
+            pool = getattr(client, "_pool", None)
+            if pool is None:
+                continue
+            monitor = self.monitors.get(client.connection_name)
+            if monitor is None:
+                monitor = self.monitors[client.connection_name] = PoolMonitor(
+                    client.connection_name
+                )
+            monitor.attach(pool)
+
+    async def warm_up(self):
+        """
+        Tortoise 在第一次查询时才创建连接池，这里提前创建，aiomysql 会同时建立 minsize 个连接
+        """
+        for client in connections.all():
+            if hasattr(client, "_pool") and client._pool is None:
+                try:
+                    await client.create_connection(with_db=True)
+                except DBConnectionError as e:
+                    # 不可用的只读副本不影响启动，由副本健康检查处理；主库不可用时后续初始化同样会失败
+                    LOG.warning(f"Failed to warm up connection pool {client.connection_name}: {e}")
+        self._attach_all()
+        for monitor in self.monitors.values():
+            LOG.info(f"Connection pool {monitor.name} warmed up: {monitor.pool.size} connections.")
+
+    async def start(self):
+        await self.warm_up()
+        if self.health_check_interval > 0:
+            self._task = asyncio.create_task(self._health_check())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _health_check(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            self._attach_all()
+            for monitor in self.monitors.values():
+                try:
+                    await monitor.check_idle_connections()
+                except Exception as e:
+                    LOG.exception(e)
+
+    def stats(self) -> dict:
+        return {name: monitor.stats() for name, monitor in self.monitors.items()}
+
+
+db_pools = PoolManager(settings.mysql.health_check_interval)
+register_metrics("db_pools", db_pools.stats)
@@ -0,0 +1,124 @@
+import asyncio
+import itertools
+from contextvars import ContextVar
+from typing import Dict, List, Optional
+
+from tortoise import connections
+from tortoise.backends.base.client import BaseTransactionWrapper, TransactionContext
+from tortoise.transactions import in_transaction
+
+from cores.log import LOG
+from cores.metrics import register_metrics
+from cores.model import PRIMARY_CONNECTION, REPLICA_CONNECTIONS
+
+# 副本健康检查的间隔（秒）
+REPLICA_CHECK_INTERVAL = 5
+
+# 当前请求（asyncio task）中是否已有写操作，之后的读都走主库，避免读不到刚写入的数据
+_pinned_to_primary: ContextVar[bool] = ContextVar("pinned_to_primary", default=False)
+
+
+def pin_to_primary():
+    """
+    当前请求剩余的查询都走主库
+    """
+    _pinned_to_primary.set(True)
+
+
+def primary_transaction() -> TransactionContext:
+    """
+    主库上的事务，并让当前请求之后的查询都走主库
+    in_transaction 直接使用主库连接，不经过路由的 db_for_write，需要在这里固定到主库
+    """
+    pin_to_primary()
+    return in_transaction(PRIMARY_CONNECTION)
+
+
+class ReplicaSet:
+    """
+    只读副本：在健康的副本间轮询，定期检查健康状态，没有健康的副本时回退到主库
+    """
+
+    def __init__(self, names: List[str]):
+        self.names = names
+        self.healthy: Dict[str, bool] = {name: True for name in names}
+        self.reads: Dict[str, int] = {name: 0 for name in names}
+        self.failures: Dict[str, int] = {name: 0 for name in names}
+        self.primary_reads = 0
+        self._cycle = itertools.cycle(names)
+        self._task: Optional[asyncio.Task] = None
+
+    def choose(self) -> Optional[str]:
+        for _ in range(len(self.names)):
+            name = next(self._cycle)
+            if self.healthy[name]:
+                self.reads[name] += 1
+                return name
+        self.primary_reads += 1
+        return None
+
+    async def check(self):
+        for name in self.names:
+            try:
+                await connections.get(name).execute_query("SELECT 1")
+            except Exception as e:
+                self.failures[name] += 1
+                if self.healthy[name]:
+                    LOG.warning(f"Replica {name} is unhealthy, reads fall back: {e!r}")
+                self.healthy[name] = False
+            else:
+                if not self.healthy[name]:
+                    LOG.info(f"Replica {name} is healthy again.")
+                self.healthy[name] = True
+
+    async def start(self):
+        if not self.names:
+            return
+        # 启动时先检查一次，不可用的副本不接收流量
+        await self.check()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(REPLICA_CHECK_INTERVAL)
+            await self.check()
+
+    def stats(self) -> dict:
+        return {
+            "replicas": {
+                name: {
+                    "healthy": self.healthy[name],
+                    "reads": self.reads[name],
+                    "failures": self.failures[name],
+                }
+                for name in self.names
+            },
+            "primary_fallback_reads": self.primary_reads,
+        }
+
+
+replica_set = ReplicaSet(REPLICA_CONNECTIONS)
+register_metrics("db_replicas", replica_set.stats)
+
+
+class ReadReplicaRouter:
+    """
+    Tortoise 路由：只读查询分发到副本，写操作、事务内的查询以及同一请求中写操作之后的查询走主库
+    """
+
+    def db_for_read(self, model) -> str:
+        if _pinned_to_primary.get():
+            return PRIMARY_CONNECTION
+        # 事务内主库的连接被替换为事务连接，查询必须使用同一个连接
+        if isinstance(connections.get(model._meta.default_connection), BaseTransactionWrapper):
+            return PRIMARY_CONNECTION
+        return replica_set.choose() or PRIMARY_CONNECTION
+
+    def db_for_write(self, model) -> str:
+        pin_to_primary()
+        return PRIMARY_CONNECTION
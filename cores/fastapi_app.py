@@ -4,9 +4,15 @@ from typing import AsyncIterator
 from fastapi import FastAPI
 from tortoise.contrib.fastapi import register_tortoise
 
+from cores.archive import archiver
+from cores.async_http import http_clients
 from cores.config import settings
+from cores.db_pool import db_pools
+from cores.db_router import replica_set
 from cores.log import LOG
 from cores.model import init_db, TORTOISE_ORM, close_db
+from cores.pwd import init_password_hash, shutdown_hash_executor
+from cores.revoke import token_revocation
 from cores.scope import init_scopes
 from cores.sio import attach_socketio
 
@@ -37,9 +43,24 @@ async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
         add_exception_handlers=True,
     )
 
+    # 预热数据库连接池，并定期检查空闲连接
+    await db_pools.start()
+
+    # 检查只读副本的健康状态
+    await replica_set.start()
+
     # 初始化全局的 scopes
     await init_scopes()
 
+    # 校准密码哈希的 cost
+    await init_password_hash()
+
+    # 同步 token 吊销记录
+    await token_revocation.start()
+
+    # 定期归档软删除的数据
+    await archiver.start()
+
     # 注册路由
     register_routes(_app)
 
@@ -50,7 +71,13 @@ async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
     yield
 
     # 应用关闭时的清理
+    await archiver.stop()
+    await token_revocation.stop()
+    await http_clients.aclose()
+    await replica_set.stop()
+    await db_pools.stop()
     await close_db()
+    shutdown_hash_executor()
 
 
 def make_app():
@@ -1,13 +1,77 @@
-from typing import Generic, TypeVar
+from typing import ClassVar, Dict, Generic, TypeVar
 
+from ghkit.enum import GEnum
 from pydantic import BaseModel
+from pypika.terms import Criterion, Term
+from tortoise.contrib.mysql.search import Mode, SearchCriterion
+from tortoise.filters import Like, escape_like, string_encoder
 from tortoise.queryset import QuerySet
 
 T = TypeVar("T")
 
+# MySQL ngram 分词的 ngram_token_size，更短的关键词无法通过全文索引匹配
+NGRAM_TOKEN_SIZE = 2
+
+
+class SearchMode(GEnum):
+    CONTAINS = "contains", "包含匹配 LIKE '%x%'，无法使用索引"
+    PREFIX = "prefix", "前缀匹配 LIKE 'x%'，可使用 B-tree 索引"
+    FULLTEXT = "fulltext", "FULLTEXT 索引（ngram 分词）短语匹配，适合中文"
+
+
+def prefix_match(field: Term, value: str) -> Criterion:
+    # Tortoise 自带的 startswith 会 CAST 字段，导致无法使用索引
+    # 不生成 ESCAPE 子句，使用 MySQL 默认的转义字符 \；
+    # pypika 默认生成的 ESCAPE '\' 在 MySQL 中反斜杠会转义右引号，导致语法错误
+    return Like(field, field.wrap_constant(f"{escape_like(value)}%"), escape="")
+
+
+def fulltext_match(field: Term, value: str) -> Criterion:
+    # 布尔模式下的短语匹配，要求关键词的所有 ngram 连续出现，效果接近包含匹配
+    phrase = '"{}"'.format(value.replace('"', " "))
+    return SearchCriterion(field, expr=field.wrap_constant(phrase), mode=Mode.BOOL_MODE)
+
+
+_SEARCH_OPERATORS = {SearchMode.PREFIX: prefix_match, SearchMode.FULLTEXT: fulltext_match}
+
+
+def apply_search(
+    query: QuerySet[T], field: str, value: str, mode: SearchMode = SearchMode.CONTAINS
+) -> QuerySet[T]:
+    """
+    按搜索方式过滤文本字段；非 MySQL 数据库以及过短的全文关键词回退为包含匹配
+    """
+    meta = query.model._meta
+    if (
+        mode == SearchMode.CONTAINS
+        or meta.db.capabilities.dialect != "mysql"
+        or (mode == SearchMode.FULLTEXT and len(value) < NGRAM_TOKEN_SIZE)
+    ):
+        return query.filter(**{f"{field}__icontains": value})
+
+    # 以自定义查找的形式注册到模型上，之后与其他过滤条件一样使用
+    key = f"{field}__{mode.value}"
+    if key not in meta.filters:
+        meta.filters[key] = {
+            "field": field,
+            "source_field": meta.fields_db_projection[field],
+            "operator": _SEARCH_OPERATORS[mode],
+            "value_encoder": string_encoder,
+        }
+    return query.filter(**{key: value})
+
 
 class FilterSet(BaseModel, Generic[T]):
+    # 各文本字段的搜索方式，未指定的字段使用包含匹配
+    search_modes: ClassVar[Dict[str, SearchMode]] = {}
+
+    def search(self, query: QuerySet[T], field: str, value: str) -> QuerySet[T]:
+        return apply_search(query, field, value, self.search_modes.get(field, SearchMode.CONTAINS))
+
     def apply_filters(self, query: QuerySet[T]) -> QuerySet[T]:
         for key, value in self.dict(exclude_none=True).items():
-            query = query.filter(**{f"{key}__icontains": value})
+            if isinstance(value, str):
+                query = self.search(query, key, value)
+            else:
+                query = query.filter(**{key: value})
         return query
@@ -1,4 +1,6 @@
-from datetime import datetime, timedelta
+import hashlib
+import uuid
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 
 from fastapi import HTTPException
@@ -6,7 +8,13 @@ from jose import JWTError, jwt
 from pydantic import BaseModel
 from starlette import status
 
+from cores.cache import LRUCache
 from cores.config import settings
+from cores.metrics import register_metrics
+
+# 已验证 token 的缓存，key 为 token 的摘要，条目在 token 的 exp 时过期
+token_cache = LRUCache(maxsize=settings.security.token_cache_size)
+register_metrics("token_cache", token_cache.stats)
 
 
 class Token(BaseModel):
@@ -20,8 +28,16 @@ def create_access_token(
     expires_delta: Optional[timedelta] = timedelta(days=settings.security.token_expire_days),
 ):
     to_encode = data.copy()
-    expire = datetime.utcnow() + expires_delta
-    to_encode.update({"exp": int(expire.timestamp())})
+    # 必须带时区：naive 的 utcnow().timestamp() 会按本地时区换算，与 time.time() 相差时区偏移
+    now = datetime.now(timezone.utc)
+    expire = now + expires_delta
+    to_encode.update(
+        {
+            "exp": int(expire.timestamp()),
+            "iat": int(now.timestamp()),
+            "jti": uuid.uuid4().hex,
+        }
+    )
     return jwt.encode(
         to_encode,
         settings.security.secret_key,
@@ -30,16 +46,27 @@ def create_access_token(
 
 
 def verify_token(token: str) -> dict:
+    """
+    校验 token 并返回 payload，已验证过的 token 直接从缓存返回，不再重复验签
+    返回的 payload 为缓存共享对象，调用方不应修改
+    """
+    digest = hashlib.sha256((token or "").encode()).digest()
+    if (payload := token_cache.get(digest)) is not None:
+        return payload
+
     try:
         payload = jwt.decode(
             token,
             settings.security.secret_key,
             algorithms=[settings.security.algorithm],
         )
-        return payload
     except JWTError:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid or expired token",
             headers={"WWW-Authenticate": "Bearer"},
         )
+
+    if exp := payload.get("exp"):
+        token_cache.set(digest, payload, expire_at=exp)
+    return payload
@@ -0,0 +1,59 @@
+from typing import Iterable, Set, Tuple
+
+from ghkit.enum import GEnum
+from pypika import Table
+from tortoise.fields.relational import ManyToManyRelation
+
+from cores.db_router import primary_transaction
+
+
+class M2MSyncMode(GEnum):
+    REPLACE = "replace", "覆盖：关联结果与给定的 id 完全一致"
+    ADD = "add", "添加给定的 id 中尚未关联的"
+    REMOVE = "remove", "删除给定的 id 中已关联的"
+
+
+async def sync_m2m(
+    relation: ManyToManyRelation, ids: Iterable[int], mode: M2MSyncMode = M2MSyncMode.REPLACE
+) -> Tuple[Set[int], Set[int]]:
+    """
+    按差异同步多对多关联：与关联表中的现有记录比较，只插入缺少的、删除多余的，
+    在一个事务内完成，读者不会看到中间状态（如先 clear 再 add 时的空关联）
+    :return: (新增关联的 id, 删除关联的 id)
+    """
+    ids = set(ids)
+    owner = relation.instance
+    field = relation.field
+    through = Table(field.through)
+    backward, forward = through[field.backward_key], through[field.forward_key]
+
+    async with primary_transaction() as conn:
+        # 锁住所属的行，同一对象的并发同步依次执行，避免基于同一快照计算差异后重复插入
+        await type(owner).filter(pk=owner.pk).using_db(conn).select_for_update().only("id")
+        _, rows = await conn.execute_query(
+            conn.query_class.from_(through).select(forward).where(backward == owner.pk).get_sql()
+        )
+        current = {row[field.forward_key] for row in rows}
+
+        to_add = ids - current if mode != M2MSyncMode.REMOVE else set()
+        if mode == M2MSyncMode.REPLACE:
+            to_remove = current - ids
+        elif mode == M2MSyncMode.REMOVE:
+            to_remove = current & ids
+        else:
+            to_remove = set()
+
+        if to_remove:
+            await conn.execute_query(
+                conn.query_class.from_(through)
+                .where((backward == owner.pk) & forward.isin(sorted(to_remove)))
+                .delete()
+                .get_sql()
+            )
+        if to_add:
+            query = conn.query_class.into(through).columns(backward, forward)
+            for related_id in sorted(to_add):
+                query = query.insert(owner.pk, related_id)
+            await conn.execute_query(query.get_sql())
+
+    return to_add, to_remove
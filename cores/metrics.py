@@ -0,0 +1,51 @@
+import bisect
+import itertools
+from typing import Callable, Dict, Sequence
+
+# 各组件注册的指标采集函数
+_collectors: Dict[str, Callable[[], dict]] = {}
+
+
+def register_metrics(name: str, collector: Callable[[], dict]):
+    """
+    注册指标采集函数，采集时调用并以 name 作为分组
+    """
+    _collectors[name] = collector
+
+
+def collect_metrics() -> dict:
+    return {name: collector() for name, collector in _collectors.items()}
+
+
+# 默认的耗时分桶上界，单位毫秒
+DEFAULT_LATENCY_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+
+class Histogram:
+    """
+    累积分桶直方图，每个桶记录不超过其上界的观测次数，最后一个桶（"+Inf"）即总次数
+    """
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * len(self.buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.count += 1
+        self.sum += value
+        # 只记入第一个满足条件的桶，导出时再累加
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+    def snapshot(self) -> dict:
+        return {
+            "buckets": {
+                **dict(zip(map(str, self.buckets), itertools.accumulate(self.counts))),
+                "+Inf": self.count,
+            },
+            "count": self.count,
+            "sum": round(self.sum, 2),
+        }
@@ -1,19 +1,29 @@
-from tortoise import Tortoise, fields, models
+from typing import Optional
+
+from tortoise import BaseDBAsyncClient, Tortoise, fields, models, timezone
 from tortoise.queryset import QuerySet
 
-from cores.config import settings
+from cores.config import MySQLConfig, settings
 
 
 class SoftDeleteQuerySet(QuerySet):
     def active(self):
         return self.filter(deleted_at=None)
 
+    async def soft_delete(self) -> int:
+        """
+        批量软删除，返回受影响的行数
+        """
+        now = timezone.now()
+        return await self.update(deleted_at=now, updated_at=now)
+
 
 class Model(models.Model):
     id = fields.IntField(pk=True)
     creator = fields.ForeignKeyField("models.User", on_delete=fields.CASCADE, null=True)
     created_at = fields.DatetimeField(auto_now_add=True)
     updated_at = fields.DatetimeField(auto_now=True)
+    # 索引见迁移 2_*_soft_delete_indexes
     deleted_at = fields.DatetimeField(default=None, null=True)
 
     class Meta:
@@ -23,23 +33,41 @@ class Model(models.Model):
     def get_queryset(cls):
         return SoftDeleteQuerySet(cls).active()
 
+    async def soft_delete(self, using_db: Optional[BaseDBAsyncClient] = None):
+        """
+        软删除当前对象，之后由归档任务移到归档表
+        """
+        self.deleted_at = timezone.now()
+        await self.save(update_fields=["deleted_at", "updated_at"], using_db=using_db)
+
+
+def mysql_connection(mysql: MySQLConfig) -> dict:
+    return {
+        "engine": "tortoise.backends.mysql",
+        "credentials": {
+            "host": mysql.host,
+            "port": mysql.port,
+            "user": mysql.user,
+            "password": mysql.password,
+            "database": mysql.database,
+            "maxsize": mysql.maxsize,  # 最大连接数
+            "minsize": mysql.minsize,  # 最小连接数
+            "connect_timeout": mysql.connect_timeout,  # 连接超时时间
+            "pool_recycle": mysql.pool_recycle,  # 空闲连接回收时间
+            "charset": "utf8mb4",
+        },
+    }
+
+
+# 主库连接名，只读副本的连接名为 replica_1、replica_2...
+PRIMARY_CONNECTION = "default"
+REPLICA_CONNECTIONS = [f"replica_{i}" for i in range(1, len(settings.mysql_replicas) + 1)]
 
 TORTOISE_ORM = {
     "connections": {
-        "default": {
-            "engine": "tortoise.backends.mysql",
-            "credentials": {
-                "host": settings.mysql.host,
-                "port": settings.mysql.port,
-                "user": settings.mysql.user,
-                "password": settings.mysql.password,
-                "database": settings.mysql.database,
-                "maxsize": 10,  # 最大连接数
-                "minsize": 1,  # 最小连接数
-                "connect_timeout": 15,  # 连接超时时间
-                "charset": "utf8mb4",
-            },
-        }},
+        PRIMARY_CONNECTION: mysql_connection(settings.mysql),
+        **dict(zip(REPLICA_CONNECTIONS, map(mysql_connection, settings.mysql_replicas))),
+    },
     "apps": {
         "models": {
             "models": [
@@ -47,11 +75,15 @@ TORTOISE_ORM = {
                 # "app.blog.models",
                 "aerich.models",
             ],
-            "default_connection": "default",
+            "default_connection": PRIMARY_CONNECTION,
         },
     },
 }
 
+# 配置了只读副本时，由路由把只读查询分发到副本
+if REPLICA_CONNECTIONS:
+    TORTOISE_ORM["routers"] = ["cores.db_router.ReadReplicaRouter"]
+
 
 async def init_db():
     await Tortoise.init(config=TORTOISE_ORM)
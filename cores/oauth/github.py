@@ -8,9 +8,14 @@ oauth_api = "https://github.com/login/oauth/access_token"
 emails_api = "https://api.github.com/user/emails"
 
 
-async def get_access_token(code: str) -> GithubToken:
+async def get_access_token(code: str) -> Optional[GithubToken]:
+    """
+    用授权码换取 access token，授权码无效或已过期时返回 None
+    """
+    # 授权码只能使用一次，POST 请求默认不重试
     response = await async_http_request(
         url=oauth_api,
+        method="POST",
         headers={"Accept": "application/json"},
         json={
             "client_id": settings.github.client,
@@ -19,6 +24,9 @@ async def get_access_token(code: str) -> GithubToken:
         },
     )
     json_data = response.json()
+    # 授权码错误时 GitHub 仍返回 200，通过 error 字段说明原因
+    if "error" in json_data:
+        return None
     return GithubToken(**json_data)
 
 
@@ -1,25 +1,100 @@
+import asyncio
+import base64
+import binascii
+import hashlib
+import json
 from dataclasses import dataclass
-from typing import Generic, List, Type, TypeVar
+from typing import Any, Dict, Generic, List, Optional, Tuple, Type, TypeVar, Union
 
-from fastapi import Query
+from fastapi import HTTPException, Query
 from ghkit.enum import GEnum
 from pydantic import BaseModel
+from starlette import status
+from tortoise.backends.base.client import BaseTransactionWrapper
 from tortoise.contrib.pydantic import PydanticModel
+from tortoise.contrib.pydantic.base import _get_fetch_fields
+from tortoise.expressions import Q
 from tortoise.queryset import QuerySet
 
+from cores.cache import LRUCache
+from cores.log import LOG
+from cores.metrics import register_metrics
+
 T = TypeVar("T")
 
+# 总数缓存，按 COUNT 语句（已包含过滤条件）区分；写入后最多 COUNT_CACHE_TTL 秒内总数可能不准确
+COUNT_CACHE_TTL = 10
+
+count_cache = LRUCache(maxsize=1024, ttl=COUNT_CACHE_TTL)
+register_metrics("paginate_count_cache", count_cache.stats)
+
+# schema 对应的查询列，None 表示 schema 中有关联或计算字段，不能按列读取
+_schema_columns: Dict[Type[PydanticModel], Optional[Tuple[str, ...]]] = {}
+
+
+def _columns(schema: Type[PydanticModel], queryset: QuerySet) -> Optional[Tuple[str, ...]]:
+    if schema not in _schema_columns:
+        projection = queryset.model._meta.fields_db_projection
+        fields = tuple(schema.model_fields)
+        _schema_columns[schema] = fields if all(name in projection for name in fields) else None
+    return _schema_columns[schema]
+
+
+async def _fetch_rows(
+    queryset: QuerySet, schema: Type[PydanticModel], extra: Tuple[str, ...] = ()
+) -> Optional[List[Dict[str, Any]]]:
+    columns = _columns(schema, queryset)
+    if columns is None:
+        return None
+    return await queryset.values(*columns, *[key for key in extra if key not in columns])
+
+
+async def from_queryset(schema: Type[PydanticModel], queryset: QuerySet) -> List[PydanticModel]:
+    """
+    与 schema.from_queryset 结果相同，但只查询 schema 中的列，直接由查询结果构建 schema，
+    不创建 Tortoise 模型对象；schema 含关联或计算字段时回退到 schema.from_queryset
+    """
+    rows = await _fetch_rows(queryset, schema)
+    if rows is None:
+        return await schema.from_queryset(queryset)
+    # values() 已按字段类型转换，model_validate 只做校验
+    return [schema.model_validate(row) for row in rows]
+
 
 class OrderType(GEnum):
     DESC = "desc", "-"
     ASC = "asc", ""
 
 
+class PaginationMode(GEnum):
+    OFFSET = "offset", "按页码分页"
+    CURSOR = "cursor", "按游标分页"
+
+
 class PageModel(BaseModel, Generic[T]):
     list: List[T]
-    total: int
+    # with_total=false 时为 None
+    total: Optional[int]
     page: int
     limit: int
+    # total 是否为估算值
+    approximate: bool = False
+
+
+class CursorPageModel(BaseModel, Generic[T]):
+    list: List[T]
+    limit: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class PageResult:
+    """
+    分页结果，按分页方式为 PageModel 或 CursorPageModel，用作 response_model：PageResult[UserDetail]
+    """
+
+    def __class_getitem__(cls, item):
+        return Union[PageModel[item], CursorPageModel[item]]
 
 
 @dataclass
@@ -28,10 +103,14 @@ class PaginationParams:
     limit: int = Query(10, alias="limit", ge=1)
     sort_by: List[str] = Query(None, alias="sort_by")
     sort_order: List[OrderType] = Query(None, alias="sort_order")
+    mode: PaginationMode = Query(PaginationMode.OFFSET, alias="mode")
+    cursor: Optional[str] = Query(None, alias="cursor", description="上一次返回的游标，仅游标分页")
+    with_total: bool = Query(True, alias="with_total", description="是否返回总数，仅页码分页")
+    approximate_total: bool = Query(False, alias="approximate_total", description="返回估算的总数，仅页码分页")
 
-    def apply_sorting(self, queryset: QuerySet[T]) -> QuerySet[T]:
+    def ordering(self) -> List[Tuple[str, OrderType]]:
         if not self.sort_by:
-            return queryset
+            return []
 
         if self.sort_order is None:
             self.sort_order = [OrderType.DESC]
@@ -42,28 +121,189 @@ class PaginationParams:
                 *self.sort_order[-1:] * (len(self.sort_by) - len(self.sort_order)),
             ]
 
-        queryset = queryset.order_by(
-            *[f"{order.desc}{field}" for field, order in zip(self.sort_by, self.sort_order)]
-        )
+        return list(zip(self.sort_by, self.sort_order))
+
+    def apply_sorting(self, queryset: QuerySet[T]) -> QuerySet[T]:
+        if not self.sort_by:
+            return queryset
+
+        queryset = queryset.order_by(*[f"{order.desc}{field}" for field, order in self.ordering()])
 
         return queryset
 
 
+def _cursor_error(detail: str = "Invalid cursor") -> HTTPException:
+    return HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=detail)
+
+
+def _encode_cursor(keys: List[str], forward: bool, values: list) -> str:
+    payload = json.dumps(
+        {"k": keys, "f": forward, "v": values},
+        default=lambda value: value.isoformat(),
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str, keys: List[str]) -> Tuple[bool, list]:
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        forward, values = payload["f"], payload["v"]
+    except (binascii.Error, ValueError, TypeError, KeyError):
+        raise _cursor_error()
+    # 排序键都是非空的列，游标中的值只能是标量
+    if not isinstance(forward, bool) or not isinstance(values, list):
+        raise _cursor_error()
+    if not all(isinstance(value, (str, int, float)) for value in values):
+        raise _cursor_error()
+    # 游标与当前排序不一致时无法定位
+    if payload.get("k") != keys or len(values) != len(keys):
+        raise _cursor_error("Cursor does not match sorting")
+    return forward, values
+
+
+def _seek(ordering: List[Tuple[str, OrderType]], values: list, forward: bool) -> Q:
+    """
+    排序键 (k1, k2, ..., id) 上的 seek 条件：
+    (k1 > v1) OR (k1 = v1 AND k2 > v2) OR ...，降序或向前翻页时比较方向相反
+    """
+    condition = Q()
+    equals = {}
+    for (key, order), value in zip(ordering, values):
+        ascending = (order == OrderType.ASC) == forward
+        condition |= Q(**equals, **{f"{key}__{'gt' if ascending else 'lt'}": value})
+        equals[key] = value
+    return condition
+
+
+async def paginate_by_cursor(
+    queryset: QuerySet[T],
+    pagination: PaginationParams,
+    schema: Type[PydanticModel],
+) -> CursorPageModel[T]:
+    """
+    按排序键加 id 定位（keyset），不受页深和并发插入影响；排序字段必须是模型自身非空的列
+    """
+    model = queryset.model
+    ordering = pagination.ordering()
+    for key, _ in ordering:
+        field = model._meta.fields_map.get(key)
+        if key not in model._meta.db_fields or field is None or field.null:
+            raise _cursor_error(f"Cannot paginate by cursor on {key}")
+    # 以 id 兜底保证排序唯一，方向与最后一个排序字段相同
+    if "id" not in dict(ordering):
+        ordering.append(("id", ordering[-1][1] if ordering else OrderType.DESC))
+    keys = [key for key, _ in ordering]
+
+    forward = True
+    if pagination.cursor:
+        forward, raw_values = _decode_cursor(pagination.cursor, keys)
+        try:
+            values = [
+                model._meta.fields_map[key].to_python_value(value)
+                for key, value in zip(keys, raw_values)
+            ]
+        except (TypeError, ValueError):
+            raise _cursor_error()
+        queryset = queryset.filter(_seek(ordering, values, forward))
+
+    # 向前翻页时反向排序，取到数据后再恢复顺序
+    if not forward:
+        ordering = [
+            (key, OrderType.DESC if order == OrderType.ASC else OrderType.ASC)
+            for key, order in ordering
+        ]
+    queryset = queryset.order_by(*[f"{order.desc}{key}" for key, order in ordering])
+    # 多取一条判断是否还有更多数据；排序键不在 schema 中时一并查询，用于生成游标
+    queryset = queryset.limit(pagination.limit + 1)
+    rows = await _fetch_rows(queryset, schema, tuple(keys))
+    if rows is None:
+        rows = await queryset.prefetch_related(*_get_fetch_fields(schema, model))
+        positions = [[getattr(row, key) for key in keys] for row in rows]
+    else:
+        positions = [[row[key] for key in keys] for row in rows]
+    items = [schema.model_validate(row) for row in rows[: pagination.limit]]
+    has_more = len(rows) > pagination.limit
+    positions = positions[: pagination.limit]
+    if not forward:
+        items.reverse()
+        positions.reverse()
+
+    has_next = has_more if forward else True
+    has_prev = bool(pagination.cursor) if forward else has_more
+    return CursorPageModel(
+        list=items,
+        limit=pagination.limit,
+        next_cursor=_encode_cursor(keys, True, positions[-1]) if items and has_next else None,
+        prev_cursor=_encode_cursor(keys, False, positions[0]) if items and has_prev else None,
+    )
+
+
+async def _approximate_count(queryset: QuerySet) -> Optional[int]:
+    """
+    通过 EXPLAIN 估算 MySQL 的行数（rows * filtered），其他数据库返回 None
+    """
+    db = queryset._choose_db()
+    if db.capabilities.dialect != "mysql":
+        return None
+    _, rows = await db.execute_query(f"EXPLAIN {queryset.count().sql()}")
+    if not rows or rows[0].get("rows") is None:
+        return None
+    return int(rows[0]["rows"] * float(rows[0].get("filtered") or 100) / 100)
+
+
+async def count_total(queryset: QuerySet, approximate: bool = False) -> Tuple[int, bool]:
+    """
+    查询总数，结果按 COUNT 语句短暂缓存
+    :return: (总数, 是否为估算值)
+    """
+    sql = queryset.count().sql()
+    key = (approximate, hashlib.sha1(sql.encode()).hexdigest())
+    if (cached := count_cache.get(key)) is not None:
+        return cached
+
+    total = None
+    if approximate:
+        try:
+            total = await _approximate_count(queryset)
+        except Exception as e:
+            LOG.warning(f"Failed to estimate count, falling back to COUNT: {e!r}")
+    result = (await queryset.count(), False) if total is None else (total, True)
+    count_cache.set(key, result)
+    return result
+
+
 async def paginate(
     queryset: QuerySet[T],
     pagination: PaginationParams,
     schema: Type[PydanticModel],
-) -> PageModel[T]:
-    total = await queryset.count()
-    queryset = (
+) -> Union[PageModel[T], CursorPageModel[T]]:
+    if pagination.mode == PaginationMode.CURSOR:
+        return await paginate_by_cursor(queryset, pagination, schema)
+
+    page_queryset = (
         pagination.apply_sorting(queryset)
         .offset((pagination.page - 1) * pagination.limit)
         .limit(pagination.limit)
     )
-    items = await schema.from_queryset(queryset)
+    if not pagination.with_total:
+        items = await from_queryset(schema, page_queryset)
+        return PageModel(list=items, total=None, page=pagination.page, limit=pagination.limit)
+
+    count = count_total(queryset, approximate=pagination.approximate_total)
+    if isinstance(queryset._choose_db(), BaseTransactionWrapper):
+        # 事务内只有一个连接，不能并发查询
+        total, approximate = await count
+        items = await from_queryset(schema, page_queryset)
+    else:
+        # 总数和当前页分别从连接池取连接，并发查询
+        (total, approximate), items = await asyncio.gather(
+            count, from_queryset(schema, page_queryset)
+        )
     return PageModel(
         list=items,
         total=total,
         page=pagination.page,
         limit=pagination.limit,
+        approximate=approximate,
     )
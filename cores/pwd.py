@@ -1,7 +1,36 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
 from passlib.context import CryptContext
+from redis.exceptions import RedisError
+
+from cores.config import settings
+from cores.log import LOG
+from cores.metrics import register_metrics
+from cores.redis import ASYNC_REDIS
+from cores.redis_proxy import AuthRedis
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
+# bcrypt 计算会释放 GIL，放到线程池中执行，避免阻塞事件循环
+_hash_workers = settings.security.pwd_hash_workers
+_hash_executor = ThreadPoolExecutor(max_workers=_hash_workers, thread_name_prefix="pwd-hash")
+_hash_semaphore = asyncio.Semaphore(_hash_workers)
+_hash_stats = {"in_flight": 0, "waiting": 0, "max_waiting": 0, "completed": 0, "rejected": 0}
+
+# bcrypt 的 cost 按目标校验耗时在启动时校准，集群内通过 Redis 共享同一个值，
+# 避免各 worker 校准结果不一致导致登录时来回重新哈希
+PASSWORD_ROUNDS_TTL = 24 * 3600
+_CALIBRATION_SAMPLES = 3
+_cost_stats = {"rounds": None, "estimated_verify_ms": None}
+_verify_stats = {"count": 0, "total_ms": 0.0, "max_ms": 0.0, "rehashed": 0}
+
+
+class PasswordHashBusy(Exception):
+    """密码哈希线程池繁忙"""
+
 
 def verify_password(plain_password, hashed_password) -> bool:
     return pwd_context.verify(plain_password, hashed_password)
@@ -9,3 +38,165 @@ def verify_password(plain_password, hashed_password) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def _timed(func, *args):
+    start = time.perf_counter()
+    result = func(*args)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def _record_verify(duration_ms: float):
+    _verify_stats["count"] += 1
+    _verify_stats["total_ms"] += duration_ms
+    _verify_stats["max_ms"] = max(_verify_stats["max_ms"], duration_ms)
+
+
+def _measure_rounds(rounds: int) -> float:
+    """
+    测量指定 cost 下一次校验的耗时（毫秒），取多次采样的最小值以排除调度抖动
+    """
+    handler = pwd_context.handler("bcrypt").using(rounds=rounds)
+    hashed = handler.hash("calibration")
+    return min(
+        _timed(handler.verify, "calibration", hashed)[1] for _ in range(_CALIBRATION_SAMPLES)
+    )
+
+
+def calibrate_rounds(target_ms: float, min_rounds: int, max_rounds: int) -> Tuple[int, float]:
+    """
+    选出校验耗时不超过 target_ms 的最大 cost，返回 (cost, 预估耗时)
+
+    bcrypt 的 cost 每加 1 耗时翻倍，只需在最小 cost 下测量一次再推算
+    """
+    duration = _measure_rounds(min_rounds)
+    rounds = min_rounds
+    while rounds < max_rounds and duration * 2 <= target_ms:
+        rounds += 1
+        duration *= 2
+    return rounds, duration
+
+
+def apply_rounds(rounds: int):
+    """
+    设置 bcrypt 的 cost，cost 不同的已有哈希会被 needs_update 判定为需要更新
+    """
+    pwd_context.update(
+        bcrypt__default_rounds=rounds, bcrypt__min_rounds=rounds, bcrypt__max_rounds=rounds
+    )
+    _cost_stats["rounds"] = rounds
+
+
+async def init_password_hash():
+    """
+    确定 bcrypt 的 cost：优先使用集群中已校准的值，没有时在本机校准并写入 Redis
+    """
+    security = settings.security
+    if security.pwd_min_rounds >= security.pwd_max_rounds:
+        apply_rounds(security.pwd_min_rounds)
+        return
+
+    auth_redis = AuthRedis(ASYNC_REDIS)
+    try:
+        rounds = await auth_redis.password_rounds()
+    except RedisError as e:
+        LOG.exception(e)
+        rounds = None
+
+    if rounds is None:
+        rounds, duration = await asyncio.get_running_loop().run_in_executor(
+            _hash_executor,
+            calibrate_rounds,
+            security.pwd_verify_target_ms,
+            security.pwd_min_rounds,
+            security.pwd_max_rounds,
+        )
+        _cost_stats["estimated_verify_ms"] = round(duration, 2)
+        LOG.info(f"Calibrated bcrypt rounds: {rounds} (~{duration:.0f}ms per verification).")
+        try:
+            # 多个 worker 同时校准时以先写入的为准
+            if not await auth_redis.set_password_rounds(rounds, PASSWORD_ROUNDS_TTL):
+                rounds = await auth_redis.password_rounds() or rounds
+        except RedisError as e:
+            LOG.exception(e)
+
+    apply_rounds(min(max(rounds, security.pwd_min_rounds), security.pwd_max_rounds))
+
+
+async def _run_in_hash_executor(func, *args, max_pending: Optional[int] = None):
+    if max_pending is not None and _hash_stats["in_flight"] + _hash_stats["waiting"] >= max_pending:
+        _hash_stats["rejected"] += 1
+        raise PasswordHashBusy()
+
+    _hash_stats["waiting"] += 1
+    _hash_stats["max_waiting"] = max(_hash_stats["max_waiting"], _hash_stats["waiting"])
+    try:
+        await _hash_semaphore.acquire()
+    finally:
+        _hash_stats["waiting"] -= 1
+
+    _hash_stats["in_flight"] += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_hash_executor, func, *args)
+    finally:
+        _hash_stats["in_flight"] -= 1
+        _hash_stats["completed"] += 1
+        _hash_semaphore.release()
+
+
+async def async_verify_password(
+    plain_password, hashed_password, max_pending: Optional[int] = None
+) -> bool:
+    """
+    :param max_pending: 进行中和排队中的任务总数上限，超出时抛出 PasswordHashBusy 而不是排队
+    """
+    verified, duration = await _run_in_hash_executor(
+        _timed, verify_password, plain_password, hashed_password, max_pending=max_pending
+    )
+    _record_verify(duration)
+    return verified
+
+
+async def async_verify_and_update(
+    plain_password, hashed_password, max_pending: Optional[int] = None
+) -> Tuple[bool, Optional[str]]:
+    """
+    校验密码，密码正确且哈希的 cost 与当前设置不同时，同时返回按当前 cost 重新计算的哈希
+    :return: (是否正确, 新的哈希或 None)
+    """
+    (verified, new_hash), duration = await _run_in_hash_executor(
+        _timed,
+        pwd_context.verify_and_update,
+        plain_password,
+        hashed_password,
+        max_pending=max_pending,
+    )
+    _record_verify(duration)
+    if new_hash is not None:
+        _verify_stats["rehashed"] += 1
+    return verified, new_hash
+
+
+async def async_get_password_hash(password: str) -> str:
+    return await _run_in_hash_executor(get_password_hash, password)
+
+
+def hash_stats() -> dict:
+    count = _verify_stats["count"]
+    return {
+        "workers": _hash_workers,
+        **_hash_stats,
+        **_cost_stats,
+        "target_verify_ms": settings.security.pwd_verify_target_ms,
+        "verify_count": count,
+        "verify_avg_ms": round(_verify_stats["total_ms"] / count, 2) if count else None,
+        "verify_max_ms": round(_verify_stats["max_ms"], 2),
+        "rehashed": _verify_stats["rehashed"],
+    }
+
+
+def shutdown_hash_executor():
+    _hash_executor.shutdown(wait=False, cancel_futures=True)
+
+
+register_metrics("password_hash", hash_stats)
@@ -0,0 +1,71 @@
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from cores.log import LOG
+
+# 滑动窗口限流脚本：先检查所有维度，全部通过后再统一计数，返回被拒绝的维度序号（从 1 开始），0 表示通过
+# KEYS: 各维度的 key；ARGV: now(ms), member, 然后依次是各维度的 window(ms), limit
+SLIDING_WINDOW_SCRIPT = """
+local now = tonumber(ARGV[1])
+local member = ARGV[2]
+for i, key in ipairs(KEYS) do
+    local window = tonumber(ARGV[i * 2 + 1])
+    local limit = tonumber(ARGV[i * 2 + 2])
+    redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+    if redis.call('ZCARD', key) >= limit then
+        return i
+    end
+end
+for i, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, tonumber(ARGV[i * 2 + 1]))
+end
+return 0
+"""
+
+
+@dataclass
+class RateLimit:
+    name: str
+    limit: int
+    window: int  # 窗口大小，单位秒
+
+
+class SlidingWindowLimiter:
+    """
+    基于 Redis 有序集合的滑动窗口限流，多个维度在一次 Lua 脚本调用中原子地检查并计数
+    """
+
+    def __init__(self, redis, prefix: str, *limits: RateLimit):
+        self.prefix = prefix
+        self.limits = {limit.name: limit for limit in limits}
+        self._script = redis.register_script(SLIDING_WINDOW_SCRIPT)
+
+    async def hit(self, **identities: Optional[str]) -> Optional[RateLimit]:
+        """
+        记录一次请求，超出限制时返回被触发的限制，不计数；Redis 不可用时放行
+        :param identities: 各维度的标识，key 为 RateLimit.name，值为 None 的维度不检查
+        """
+        limits = [
+            (self.limits[name], identity)
+            for name, identity in identities.items()
+            if identity is not None
+        ]
+        if not limits:
+            return None
+
+        keys = [f"{self.prefix}:{limit.name}:{identity}" for limit, identity in limits]
+        args = [int(time.time() * 1000), uuid.uuid4().hex]
+        for limit, _ in limits:
+            args.extend([limit.window * 1000, limit.limit])
+
+        try:
+            rejected = await self._script(keys=keys, args=args)
+        except RedisError as e:
+            LOG.exception(e)
+            return None
+        return limits[rejected - 1][0] if rejected else None
@@ -1,6 +1,59 @@
+from typing import AsyncIterator, Iterable, Optional
+
+
 class AuthRedis:
+    """
+    鉴权相关的 Redis 操作
+    """
+
+    # 被吊销的 token，key 为 jti
+    REVOKED_TOKEN_KEY = "auth:revoked:token:{}"
+    # 被吊销的用户，值为吊销时间，早于该时间签发的 token 全部失效
+    REVOKED_USER_KEY = "auth:revoked:user:{}"
+    REVOKED_KEY_PATTERN = "auth:revoked:*"
+    # 吊销通知频道，消息内容为 "token:<jti>" 或 "user:<username>"
+    REVOKED_CHANNEL = "auth:revoked"
+    # 集群共用的 bcrypt cost
+    PASSWORD_ROUNDS_KEY = "auth:password_rounds"
+
     def __init__(self, redis):
         self.redis = redis
 
-    def token_exists(self, token):
-        self.redis
+    async def revoke_token(self, jti: str, ttl: int):
+        await self.redis.set(self.REVOKED_TOKEN_KEY.format(jti), 1, ex=ttl)
+        await self.redis.publish(self.REVOKED_CHANNEL, f"token:{jti}")
+
+    async def revoke_users(self, usernames: Iterable[str], revoked_at: int, ttl: int):
+        """
+        写入吊销记录并发送通知，多个用户合并为一次往返
+        """
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for username in usernames:
+                pipe.set(self.REVOKED_USER_KEY.format(username), revoked_at, ex=ttl)
+                pipe.publish(self.REVOKED_CHANNEL, f"user:{username}")
+            await pipe.execute()
+
+    async def token_revoked(self, jti: str) -> bool:
+        return bool(await self.redis.exists(self.REVOKED_TOKEN_KEY.format(jti)))
+
+    async def user_revoked_at(self, username: str) -> Optional[int]:
+        revoked_at = await self.redis.get(self.REVOKED_USER_KEY.format(username))
+        return int(revoked_at) if revoked_at else None
+
+    async def scan_revoked(self) -> AsyncIterator[str]:
+        """
+        遍历所有吊销记录，返回与通知消息相同格式的条目
+        """
+        prefix_length = len(self.REVOKED_KEY_PATTERN) - 1
+        async for key in self.redis.scan_iter(match=self.REVOKED_KEY_PATTERN, count=1000):
+            yield key[prefix_length:]
+
+    async def password_rounds(self) -> Optional[int]:
+        rounds = await self.redis.get(self.PASSWORD_ROUNDS_KEY)
+        return int(rounds) if rounds else None
+
+    async def set_password_rounds(self, rounds: int, ttl: int) -> bool:
+        """
+        仅在尚未设置时写入，返回是否写入成功
+        """
+        return bool(await self.redis.set(self.PASSWORD_ROUNDS_KEY, rounds, ex=ttl, nx=True))
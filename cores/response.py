@@ -1,10 +1,20 @@
-from typing import Generic, Optional, TypeVar
+import functools
+import inspect
+from typing import Any, Callable, Generic, Optional, TypeVar
 
+from fastapi import Response
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
 from ghkit.enum import GEnum
 from pydantic import BaseModel
+from pydantic_core import to_json
 
 T = TypeVar("T")
 
+# endpoint 没有声明 Response 参数时，包装后额外声明的参数名；
+# FastAPI 向其注入与依赖中相同的 Response，用于合并依赖和 endpoint 设置的状态码和响应头
+SUB_RESPONSE_PARAM = "_fast_json_sub_response"
+
 
 class ResponseCode(GEnum):
     SUCCESS = 20000, "Success"
@@ -14,3 +24,64 @@ class ResponseModel(BaseModel, Generic[T]):
     code: ResponseCode = ResponseCode.SUCCESS
     msg: str = code.desc
     data: Optional[T] = None
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    用 pydantic-core 直接把内容序列化为 JSON 字节，pydantic 对象不需要先转换为 dict
+    """
+
+    def render(self, content: Any) -> bytes:
+        return to_json(content)
+
+
+def _fast_json_endpoint(endpoint: Callable, status_code: Optional[int]) -> Callable:
+    signature = inspect.signature(endpoint)
+    # FastAPI 只向一个 Response 参数注入，endpoint 已声明时直接复用
+    declared = next(
+        (
+            name
+            for name, parameter in signature.parameters.items()
+            if inspect.isclass(parameter.annotation) and issubclass(parameter.annotation, Response)
+        ),
+        None,
+    )
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        if declared:
+            sub_response: Response = kwargs[declared]
+        else:
+            sub_response = kwargs.pop(SUB_RESPONSE_PARAM)
+        content = await endpoint(*args, **kwargs)
+        if not isinstance(content, ResponseModel):
+            return content
+        response = FastJSONResponse(content)
+        if current_status_code := status_code or sub_response.status_code:
+            response.status_code = current_status_code
+        response.headers.raw.extend(sub_response.headers.raw)
+        return response
+
+    if not declared:
+        parameter = inspect.Parameter(
+            SUB_RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response
+        )
+        wrapper.__signature__ = signature.replace(
+            parameters=[*signature.parameters.values(), parameter]
+        )
+    wrapper.fast_json = True
+    return wrapper
+
+
+class FastJSONRoute(APIRoute):
+    """
+    endpoint 返回的 ResponseModel 在构建时已经校验过，直接序列化为 FastJSONResponse，
+    跳过 FastAPI 按 response_model 的再次校验和 jsonable_encoder；
+    response_model 仍用于生成文档，返回的 data 须与其声明的类型一致
+    """
+
+    def __init__(self, path: str, endpoint: Callable, **kwargs):
+        # include_router 会用已包装的 endpoint 重新创建路由
+        if inspect.iscoroutinefunction(endpoint) and not getattr(endpoint, "fast_json", False):
+            endpoint = _fast_json_endpoint(endpoint, kwargs.get("status_code"))
+        super().__init__(path, endpoint, **kwargs)
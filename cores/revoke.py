@@ -0,0 +1,143 @@
+import asyncio
+import time
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from cores.bloom import BloomFilter
+from cores.config import settings
+from cores.log import LOG
+from cores.metrics import register_metrics
+from cores.redis import ASYNC_REDIS
+from cores.redis_proxy import AuthRedis
+
+# 本地布隆过滤器的重建间隔，清理已过期的吊销记录
+BLOOM_REBUILD_INTERVAL = 3600
+
+
+class TokenRevocation:
+    """
+    token 吊销
+
+    吊销记录保存在 Redis 中，每个 worker 在本地维护一个布隆过滤器，并通过 pub/sub 同步，
+    未被吊销的 token（绝大多数情况）无需访问 Redis；布隆过滤器命中时再到 Redis 确认
+    """
+
+    def __init__(self, auth_redis: AuthRedis, capacity: int):
+        self.auth_redis = auth_redis
+        self.capacity = capacity
+        self._bloom = BloomFilter(capacity)
+        # 布隆过滤器未加载完成前，所有检查都回源 Redis
+        self._ready = False
+        self._task: Optional[asyncio.Task] = None
+        self.redis_checks = 0
+
+    async def start(self):
+        self._task = asyncio.create_task(self._sync())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def _rebuild(self):
+        bloom = BloomFilter(self.capacity)
+        async for entry in self.auth_redis.scan_revoked():
+            bloom.add(entry)
+        self._bloom = bloom
+        self._ready = True
+        LOG.info(f"Revocation bloom filter rebuilt with {bloom.count} entries.")
+
+    async def _sync(self):
+        while True:
+            pubsub = self.auth_redis.redis.pubsub()
+            try:
+                # 先订阅再加载，保证加载期间的吊销通知不会丢失
+                await pubsub.subscribe(self.auth_redis.REVOKED_CHANNEL)
+                await self._rebuild()
+                rebuild_at = time.monotonic() + BLOOM_REBUILD_INTERVAL
+                while True:
+                    if time.monotonic() >= rebuild_at:
+                        await self._rebuild()
+                        rebuild_at = time.monotonic() + BLOOM_REBUILD_INTERVAL
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=1)
+                    if message:
+                        self._bloom.add(message["data"])
+            except RedisError as e:
+                self._ready = False
+                LOG.exception(e)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()
+
+    def _may_be_revoked(self, entry: str) -> bool:
+        return not self._ready or entry in self._bloom
+
+    async def is_revoked(self, payload: dict) -> bool:
+        """
+        检查 token 是否已被吊销，Redis 不可用时放行
+        """
+        jti = payload.get("jti")
+        username = payload.get("sub")
+        try:
+            if jti and self._may_be_revoked(f"token:{jti}"):
+                self.redis_checks += 1
+                if await self.auth_redis.token_revoked(jti):
+                    return True
+            if username and self._may_be_revoked(f"user:{username}"):
+                self.redis_checks += 1
+                revoked_at = await self.auth_redis.user_revoked_at(username)
+                if revoked_at and payload.get("iat", 0) < revoked_at:
+                    return True
+        except RedisError as e:
+            LOG.exception(e)
+        return False
+
+    async def revoke_token(self, payload: dict):
+        """
+        吊销单个 token，没有 jti 的旧 token 只能按用户吊销
+        """
+        jti = payload.get("jti")
+        if not jti:
+            await self.revoke_user(payload["sub"])
+            return
+
+        ttl = int(payload["exp"] - time.time())
+        if ttl <= 0:
+            return
+        self._bloom.add(f"token:{jti}")
+        await self.auth_redis.revoke_token(jti, ttl)
+
+    async def revoke_user(self, username: str):
+        """
+        吊销用户当前所有的 token
+        """
+        await self.revoke_users(username)
+
+    async def revoke_users(self, *usernames: str):
+        """
+        吊销多个用户当前所有的 token，一次 Redis 往返
+        """
+        if not usernames:
+            return
+        # iat 精确到秒，同一秒内签发的 token 也一并吊销
+        revoked_at = int(time.time()) + 1
+        ttl = settings.security.token_expire_days * 24 * 3600
+        for username in usernames:
+            self._bloom.add(f"user:{username}")
+        await self.auth_redis.revoke_users(usernames, revoked_at, ttl)
+
+    def stats(self) -> dict:
+        return {
+            "ready": self._ready,
+            "entries": self._bloom.count,
+            "capacity": self.capacity,
+            "redis_checks": self.redis_checks,
+        }
+
+
+token_revocation = TokenRevocation(
+    AuthRedis(ASYNC_REDIS),
+    capacity=settings.security.revoked_bloom_capacity,
+)
+register_metrics("token_revocation", token_revocation.stats)
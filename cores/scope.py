@@ -1,36 +1,176 @@
-from typing import Union
+import base64
+import hashlib
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Union
 
 from app.system.models import Permission
 
 scopes = {}
 
+# 标记节点本身已被授权
+_GRANTED = object()
+
 
 async def init_scopes():
-    global scopes
+    permissions = await Permission.get_queryset().all()
+
+    # 原地更新，保证引用了 scopes 的地方（如 oauth2_scheme）能看到最新数据
+    scopes.clear()
+    scopes.update({permission.name: permission.description for permission in permissions})
+    scope_registry.load({permission.name: permission.id for permission in permissions})
+
+
+class ScopeTrie:
+    """
+    按 ":" 分段的权限前缀树，已授权的节点覆盖其下所有子权限
+    每次检查的开销只与权限的层级数有关，与授权数量无关
+    >>> trie = ScopeTrie(["system:user", "blog"])
+    >>> trie.covers("system:user:read")
+    True
+    >>> trie.covers("system:role:read")
+    False
+    >>> trie.missing(["blog:post:read", "system:role", "system:user"])
+    ['system:role']
+    """
+
+    __slots__ = ("_root",)
 
-    scopes = {
-        permission.name: permission.description
-        for permission in await Permission.get_queryset().all()
-    }
+    def __init__(self, scope_list: Iterable[str] = ()):
+        self._root = {}
+        for scope in sorted(scope_list, key=lambda x: x.count(":")):
+            self.add(scope)
+
+    def add(self, scope: str) -> bool:
+        """
+        添加授权，已被覆盖时返回 False
+        """
+        node = self._root
+        for part in scope.split(":"):
+            if _GRANTED in node:
+                return False
+            node = node.setdefault(part, {})
+        if _GRANTED in node:
+            return False
+        # 子权限已被当前权限覆盖，不再需要保留
+        node.clear()
+        node[_GRANTED] = True
+        return True
+
+    def covers(self, scope: str) -> bool:
+        """
+        判断授权集合是否覆盖指定权限
+        """
+        node = self._root
+        for part in scope.split(":"):
+            if _GRANTED in node:
+                return True
+            node = node.get(part)
+            if node is None:
+                return False
+        return _GRANTED in node
+
+    def covers_all(self, scope_list: Iterable[str]) -> bool:
+        return all(self.covers(scope) for scope in scope_list)
+
+    def missing(self, scope_list: Iterable[str]) -> list[str]:
+        """
+        返回未被覆盖的权限
+        """
+        return [scope for scope in scope_list if not self.covers(scope)]
+
+
+@lru_cache(maxsize=1024)
+def compile_scopes(scope_list: tuple[str, ...]) -> ScopeTrie:
+    """
+    编译授权集合，相同的授权集合共用同一棵树，返回值不应修改
+    """
+    return ScopeTrie(scope_list)
 
 
 def filter_scopes(scope_list: Union[list[str], set[str]]) -> list[str]:
     """
-    过滤范围
+    过滤范围，去掉已被上级权限覆盖的权限
     >>> filter_scopes(["a:b:c", "a:b:d", "a:b", "d", "e:f"])
     ['d', 'a:b', 'e:f']
     """
-    # 按层级排序
-    sorted_scopes = sorted(scope_list, key=lambda x: x.count(":"))
+    trie = ScopeTrie()
+    # 按层级排序，保证上级权限先加入
+    return [scope for scope in sorted(scope_list, key=lambda x: x.count(":")) if trie.add(scope)]
+
+
+class ScopeRegistry:
+    """
+    权限编号注册表，用权限的 id 作为位序号，把权限集合编码为位图写入 token
+
+    版本号由所有 (id, name) 计算得出，各 worker 加载相同的权限时版本号一致，
+    token 中的版本号与本地不一致时位图不可信，需要回退到其它方式校验
+    >>> registry = ScopeRegistry()
+    >>> registry.load({"system:user": 1, "system:role:read": 2, "blog": 9})
+    >>> bitmap = registry.encode(["system:user", "blog"])
+    >>> registry.covers_all(bitmap, ["system:user:read", "blog:post"])
+    True
+    >>> registry.covers_all(bitmap, ["system:role:read"])
+    False
+    """
+
+    # token 中的版本号与本地不一致时，最短的重新加载间隔
+    RELOAD_INTERVAL = 10
+
+    def __init__(self):
+        self.ids: Dict[str, int] = {}
+        self.version = ""
+        self._loaded_at = 0.0
+        self._masks: Dict[str, int] = {}
+
+    def load(self, ids: Dict[str, int]):
+        self.ids = dict(ids)
+        digest = hashlib.blake2b(digest_size=6)
+        for name, scope_id in sorted(ids.items(), key=lambda item: item[1]):
+            digest.update(f"{scope_id}={name};".encode())
+        self.version = digest.hexdigest()
+        self._loaded_at = time.monotonic()
+        self._masks = {}
+
+    async def ensure_version(self, version: str):
+        """
+        遇到未知版本号时重新加载注册表，可能是其它 worker 已经加载了新的权限
+        """
+        if version != self.version and time.monotonic() - self._loaded_at > self.RELOAD_INTERVAL:
+            await init_scopes()
+
+    def encode(self, scope_list: Iterable[str]) -> Optional[str]:
+        """
+        编码为 base64 位图，存在未注册的权限时返回 None
+        """
+        bitmap = 0
+        for scope in scope_list:
+            if (scope_id := self.ids.get(scope)) is None:
+                return None
+            bitmap |= 1 << scope_id
+        raw = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, "little")
+        return base64.urlsafe_b64encode(raw).rstrip(b"=").decode()
+
+    @staticmethod
+    def decode(bitmap: str) -> int:
+        return int.from_bytes(base64.urlsafe_b64decode(bitmap + "=" * (-len(bitmap) % 4)), "little")
+
+    def _mask(self, scope: str) -> int:
+        """
+        权限本身及其所有上级权限对应的位，任意一位被授权即视为覆盖
+        """
+        if (mask := self._masks.get(scope)) is None:
+            mask = 0
+            parts = scope.split(":")
+            for depth in range(1, len(parts) + 1):
+                if (scope_id := self.ids.get(":".join(parts[:depth]))) is not None:
+                    mask |= 1 << scope_id
+            self._masks[scope] = mask
+        return mask
 
-    result = []
-    # 使用一个集合来跟踪已处理的权限
-    covered_scopes = set()
+    def covers_all(self, bitmap: str, scope_list: Iterable[str]) -> bool:
+        granted = self.decode(bitmap)
+        return all(granted & self._mask(scope) for scope in scope_list)
 
-    for scope in sorted_scopes:
-        # 检查当前权限是否被其他权限覆盖
-        if not any(scope.startswith(covered_scope + ":") for covered_scope in covered_scopes):
-            result.append(scope)
-            covered_scopes.add(scope)
 
-    return result
+scope_registry = ScopeRegistry()
@@ -13,6 +13,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],  # 允许所有方法
     allow_headers=["*"],  # 允许所有头部
+    expose_headers=["X-Access-Token"],  # 权限过期时刷新的 token
 )
 
 if __name__ == "__main__":
@@ -0,0 +1,107 @@
+from tortoise import BaseDBAsyncClient
+
+
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `system_users` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `username` VARCHAR(50) NOT NULL UNIQUE,
+    `email` VARCHAR(50) NOT NULL UNIQUE,
+    `hashed_password` VARCHAR(255) NOT NULL,
+    `is_active` BOOL NOT NULL  DEFAULT 1,
+    `is_superuser` BOOL NOT NULL  DEFAULT 0,
+    `creator_id` INT,
+    CONSTRAINT `fk_system_u_system_u_e97ae18b` FOREIGN KEY (`creator_id`)
+        REFERENCES `system_users` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_configs` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `name` VARCHAR(50) NOT NULL UNIQUE,
+    `data` JSON NOT NULL  COMMENT 'Config data',
+    `creator_id` INT,
+    CONSTRAINT `fk_system_c_system_u_a0191ffc` FOREIGN KEY (`creator_id`)
+        REFERENCES `system_users` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_menus` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `name` VARCHAR(50) NOT NULL UNIQUE,
+    `path` VARCHAR(50) NOT NULL UNIQUE,
+    `components` VARCHAR(50) NOT NULL,
+    `meta_locale` VARCHAR(50),
+    `meta_icon` VARCHAR(50),
+    `meta_requires_auth` BOOL NOT NULL  DEFAULT 0,
+    `meta_order` INT NOT NULL  DEFAULT 0,
+    `meta_hide_in_menu` BOOL NOT NULL  DEFAULT 0,
+    `meta_hide_children_in_menu` BOOL NOT NULL  DEFAULT 0,
+    `meta_no_affix` BOOL NOT NULL  DEFAULT 0,
+    `meta_ignore_cache` BOOL NOT NULL  DEFAULT 0,
+    `creator_id` INT,
+    `parent_id` INT,
+    CONSTRAINT `fk_system_m_system_u_e25f7955` FOREIGN KEY (`creator_id`)
+        REFERENCES `system_users` (`id`) ON DELETE CASCADE,
+    CONSTRAINT `fk_system_m_system_m_eba44b28` FOREIGN KEY (`parent_id`)
+        REFERENCES `system_menus` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_permissions` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `name` VARCHAR(100) NOT NULL UNIQUE,
+    `description` LONGTEXT,
+    `creator_id` INT,
+    CONSTRAINT `fk_system_p_system_u_e3c4ede6` FOREIGN KEY (`creator_id`)
+        REFERENCES `system_users` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_roles` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `created_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6),
+    `updated_at` DATETIME(6) NOT NULL  DEFAULT CURRENT_TIMESTAMP(6) ON UPDATE CURRENT_TIMESTAMP(6),
+    `deleted_at` DATETIME(6),
+    `name` VARCHAR(50) NOT NULL UNIQUE,
+    `description` LONGTEXT,
+    `creator_id` INT,
+    CONSTRAINT `fk_system_r_system_u_3d46630f` FOREIGN KEY (`creator_id`)
+        REFERENCES `system_users` (`id`) ON DELETE CASCADE
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `aerich` (
+    `id` INT NOT NULL PRIMARY KEY AUTO_INCREMENT,
+    `version` VARCHAR(255) NOT NULL,
+    `app` VARCHAR(100) NOT NULL,
+    `content` JSON NOT NULL
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_user_roles` (
+    `system_users_id` INT NOT NULL,
+    `role_id` INT NOT NULL,
+    FOREIGN KEY (`system_users_id`) REFERENCES `system_users` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`role_id`) REFERENCES `system_roles` (`id`) ON DELETE CASCADE,
+    UNIQUE KEY `uidx_system_user_system__4640af` (`system_users_id`, `role_id`)
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_role_menus` (
+    `system_roles_id` INT NOT NULL,
+    `menu_id` INT NOT NULL,
+    FOREIGN KEY (`system_roles_id`) REFERENCES `system_roles` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`menu_id`) REFERENCES `system_menus` (`id`) ON DELETE CASCADE,
+    UNIQUE KEY `uidx_system_role_system__0e615e` (`system_roles_id`, `menu_id`)
+) CHARACTER SET utf8mb4;
+CREATE TABLE IF NOT EXISTS `system_role_permissions` (
+    `system_roles_id` INT NOT NULL,
+    `permission_id` INT NOT NULL,
+    FOREIGN KEY (`system_roles_id`) REFERENCES `system_roles` (`id`) ON DELETE CASCADE,
+    FOREIGN KEY (`permission_id`) REFERENCES `system_permissions` (`id`) ON DELETE CASCADE,
+    UNIQUE KEY `uidx_system_role_system__976215` (`system_roles_id`, `permission_id`)
+) CHARACTER SET utf8mb4;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        """
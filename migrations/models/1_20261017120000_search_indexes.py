@@ -0,0 +1,24 @@
+from tortoise import BaseDBAsyncClient
+
+
+# 按名称、描述搜索使用的 FULLTEXT 索引（ngram 分词，需要 MySQL 5.7.6+）
+# 用户名、邮箱、权限名、菜单路径按前缀搜索，使用已有的唯一索引
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `system_roles`
+            ADD FULLTEXT INDEX `ft_system_roles_name` (`name`) WITH PARSER ngram;
+        ALTER TABLE `system_roles`
+            ADD FULLTEXT INDEX `ft_system_roles_description` (`description`) WITH PARSER ngram;
+        ALTER TABLE `system_permissions`
+            ADD FULLTEXT INDEX `ft_system_permissions_description` (`description`)
+            WITH PARSER ngram;
+        ALTER TABLE `system_menus`
+            ADD FULLTEXT INDEX `ft_system_menus_name` (`name`) WITH PARSER ngram;"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `system_roles` DROP INDEX `ft_system_roles_name`;
+        ALTER TABLE `system_roles` DROP INDEX `ft_system_roles_description`;
+        ALTER TABLE `system_permissions` DROP INDEX `ft_system_permissions_description`;
+        ALTER TABLE `system_menus` DROP INDEX `ft_system_menus_name`;"""
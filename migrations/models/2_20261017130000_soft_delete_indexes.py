@@ -0,0 +1,39 @@
+from tortoise import BaseDBAsyncClient
+
+
+# 软删除过滤（deleted_at IS NULL）与列表分页使用的索引：所有查询都带 deleted_at IS NULL，
+# InnoDB 二级索引隐含主键，也能用于按 id 排序的列表分页；用户列表按状态过滤、按创建时间排序，
+# 用户名或邮箱登录使用两个唯一索引（index merge）
+# 这些索引只在迁移中声明，模型中不声明（index=True / Meta.indexes），
+# 否则由模型生成的表结构再执行本迁移会因索引重名失败
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `system_users` ADD INDEX `idx_system_user_deleted_9b8f0e` (`deleted_at`);
+        ALTER TABLE `system_users`
+            ADD INDEX `idx_system_user_deleted_3d0b1c` (`deleted_at`, `is_active`);
+        ALTER TABLE `system_users`
+            ADD INDEX `idx_system_user_deleted_d66281` (`deleted_at`, `created_at`);
+        ALTER TABLE `system_roles` ADD INDEX `idx_system_role_deleted_76fec9` (`deleted_at`);
+        ALTER TABLE `system_roles`
+            ADD INDEX `idx_system_role_deleted_64d12a` (`deleted_at`, `created_at`);
+        ALTER TABLE `system_permissions` ADD INDEX `idx_system_perm_deleted_0a5742` (`deleted_at`);
+        ALTER TABLE `system_permissions`
+            ADD INDEX `idx_system_perm_deleted_9a2058` (`deleted_at`, `created_at`);
+        ALTER TABLE `system_menus` ADD INDEX `idx_system_menu_deleted_cd9c01` (`deleted_at`);
+        ALTER TABLE `system_menus`
+            ADD INDEX `idx_system_menu_deleted_135a11` (`deleted_at`, `created_at`);
+        ALTER TABLE `system_configs` ADD INDEX `idx_system_conf_deleted_af1cc3` (`deleted_at`);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        ALTER TABLE `system_users` DROP INDEX `idx_system_user_deleted_9b8f0e`;
+        ALTER TABLE `system_users` DROP INDEX `idx_system_user_deleted_3d0b1c`;
+        ALTER TABLE `system_users` DROP INDEX `idx_system_user_deleted_d66281`;
+        ALTER TABLE `system_roles` DROP INDEX `idx_system_role_deleted_76fec9`;
+        ALTER TABLE `system_roles` DROP INDEX `idx_system_role_deleted_64d12a`;
+        ALTER TABLE `system_permissions` DROP INDEX `idx_system_perm_deleted_0a5742`;
+        ALTER TABLE `system_permissions` DROP INDEX `idx_system_perm_deleted_9a2058`;
+        ALTER TABLE `system_menus` DROP INDEX `idx_system_menu_deleted_cd9c01`;
+        ALTER TABLE `system_menus` DROP INDEX `idx_system_menu_deleted_135a11`;
+        ALTER TABLE `system_configs` DROP INDEX `idx_system_conf_deleted_af1cc3`;"""
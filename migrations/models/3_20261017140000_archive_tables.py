@@ -0,0 +1,36 @@
+from tortoise import BaseDBAsyncClient
+
+
+# 软删除数据的归档表，结构与原表相同（不含外键），去掉唯一约束和全文索引，增加归档时间
+async def upgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        CREATE TABLE IF NOT EXISTS `system_users_archive` LIKE `system_users`;
+        ALTER TABLE `system_users_archive`
+            DROP INDEX `username`,
+            DROP INDEX `email`,
+            ADD `archived_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);
+        CREATE TABLE IF NOT EXISTS `system_roles_archive` LIKE `system_roles`;
+        ALTER TABLE `system_roles_archive`
+            DROP INDEX `name`,
+            DROP INDEX `ft_system_roles_name`,
+            DROP INDEX `ft_system_roles_description`,
+            ADD `archived_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);
+        CREATE TABLE IF NOT EXISTS `system_permissions_archive` LIKE `system_permissions`;
+        ALTER TABLE `system_permissions_archive`
+            DROP INDEX `name`,
+            DROP INDEX `ft_system_permissions_description`,
+            ADD `archived_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);
+        CREATE TABLE IF NOT EXISTS `system_menus_archive` LIKE `system_menus`;
+        ALTER TABLE `system_menus_archive`
+            DROP INDEX `name`,
+            DROP INDEX `path`,
+            DROP INDEX `ft_system_menus_name`,
+            ADD `archived_at` DATETIME(6) NOT NULL DEFAULT CURRENT_TIMESTAMP(6);"""
+
+
+async def downgrade(db: BaseDBAsyncClient) -> str:
+    return """
+        DROP TABLE IF EXISTS `system_users_archive`;
+        DROP TABLE IF EXISTS `system_roles_archive`;
+        DROP TABLE IF EXISTS `system_permissions_archive`;
+        DROP TABLE IF EXISTS `system_menus_archive`;"""
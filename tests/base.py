@@ -0,0 +1,16 @@
+import unittest
+
+from tortoise import Tortoise
+
+
+class DBTestCase(unittest.IsolatedAsyncioTestCase):
+    """
+    每个测试使用独立的 SQLite 内存数据库
+    """
+
+    async def asyncSetUp(self):
+        await Tortoise.init(db_url="sqlite://:memory:", modules={"models": ["app.system.models"]})
+        await Tortoise.generate_schemas()
+
+    async def asyncTearDown(self):
+        await Tortoise.close_connections()
@@ -0,0 +1,7 @@
+import os
+from pathlib import Path
+
+# 测试使用示例配置，不依赖部署环境的 config.ini
+os.environ.setdefault(
+    "CONFIG_FILE_PATH", str(Path(__file__).resolve().parent.parent / "config.ini.example")
+)
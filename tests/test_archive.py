@@ -0,0 +1,69 @@
+import unittest
+from unittest import mock
+
+from cores import archive
+from cores.archive import Archiver
+from cores.config import ArchiveConfig
+from cores.db_router import replica_set
+
+
+class FakeConnection:
+    """
+    按语句返回结果，不支持的语句抛出异常
+    """
+
+    def __init__(self, results: dict):
+        self.results = results
+        self.statements = []
+
+    async def execute_query(self, statement: str):
+        self.statements.append(statement)
+        result = self.results.get(statement)
+        if result is None:
+            raise Exception(f"You have an error in your SQL syntax near '{statement}'")
+        return len(result), result
+
+
+class ReplicationLagTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.archiver = Archiver([], ArchiveConfig())
+        self.replicas = {
+            # MySQL 8.0.22+
+            "replica_0": FakeConnection(
+                {
+                    "SHOW REPLICA STATUS": [{"Seconds_Behind_Source": 3}],
+                    "SHOW SLAVE STATUS": [{"Seconds_Behind_Master": 3}],
+                }
+            ),
+            # MySQL 5.7
+            "replica_1": FakeConnection({"SHOW SLAVE STATUS": [{"Seconds_Behind_Master": 7}]}),
+            # 复制线程未运行
+            "replica_2": FakeConnection({"SHOW REPLICA STATUS": [{"Seconds_Behind_Source": None}]}),
+        }
+        for target, attribute, value in (
+            (replica_set, "names", list(self.replicas)),
+            (archive, "connections", mock.Mock(get=self.replicas.get)),
+        ):
+            patcher = mock.patch.object(target, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    async def test_replica_status_with_fallback(self):
+        self.assertEqual(await self.archiver._replication_lag(), 7)
+        self.assertEqual(self.replicas["replica_0"].statements, ["SHOW REPLICA STATUS"])
+        self.assertEqual(
+            self.replicas["replica_1"].statements, ["SHOW REPLICA STATUS", "SHOW SLAVE STATUS"]
+        )
+
+        # 之后直接使用可用的语句
+        await self.archiver._replication_lag()
+        self.assertEqual(
+            self.replicas["replica_1"].statements,
+            ["SHOW REPLICA STATUS", "SHOW SLAVE STATUS", "SHOW SLAVE STATUS"],
+        )
+
+    async def test_unavailable(self):
+        self.replicas["replica_1"].results.clear()
+        self.assertEqual(await self.archiver._replication_lag(), 3)
+        self.replicas["replica_0"].results.clear()
+        self.assertIsNone(await self.archiver._replication_lag())
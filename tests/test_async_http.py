@@ -0,0 +1,149 @@
+import asyncio
+import dataclasses
+import unittest
+from unittest import mock
+
+import httpx
+
+from cores import async_http
+from cores.async_http import (
+    CircuitBreaker,
+    HttpClientRegistry,
+    UpstreamBadResponse,
+    UpstreamTimeout,
+    UpstreamUnavailable,
+    async_http_request,
+)
+from cores.config import settings
+
+URL = "http://upstream.test/resource"
+
+
+class AsyncHttpRequestTest(unittest.IsolatedAsyncioTestCase):
+    """
+    用 httpx.MockTransport 模拟上游，按顺序返回 self.responses 中的响应
+    """
+
+    async def asyncSetUp(self):
+        self.config = dataclasses.replace(
+            settings.http, retries=2, retry_backoff=0, breaker_failure_threshold=3
+        )
+        self.registry = HttpClientRegistry(self.config)
+        self.registry._create_client = lambda: httpx.AsyncClient(
+            transport=httpx.MockTransport(self.handler)
+        )
+        for target, attribute, value in (
+            (async_http, "http_clients", self.registry),
+            (settings, "http", self.config),
+        ):
+            patcher = mock.patch.object(target, attribute, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.requests = []
+        self.responses = []
+
+    async def asyncTearDown(self):
+        await self.registry.aclose()
+
+    async def handler(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        response = self.responses.pop(0) if len(self.responses) > 1 else self.responses[0]
+        if isinstance(response, Exception):
+            raise response
+        if callable(response):
+            return await response()
+        return httpx.Response(response)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        return self.registry.breaker(URL)
+
+    async def test_retry_until_success(self):
+        self.responses = [503, httpx.ConnectError("refused"), 200]
+        response = await async_http_request(URL)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.registry.host_stats(URL).retries, 2)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+
+    async def test_retries_exhausted(self):
+        self.responses = [503]
+        with self.assertRaises(UpstreamBadResponse) as context:
+            await async_http_request(URL, retries=1)
+        self.assertEqual(context.exception.response.status_code, 503)
+        self.assertEqual(len(self.requests), 2)
+
+    async def test_non_idempotent_not_retried(self):
+        self.responses = [503, 200]
+        with self.assertRaises(UpstreamBadResponse):
+            await async_http_request(URL, method="POST")
+        self.assertEqual(len(self.requests), 1)
+
+    async def test_client_error_not_retried(self):
+        self.responses = [404]
+        with self.assertRaises(UpstreamBadResponse):
+            await async_http_request(URL)
+        self.assertEqual(len(self.requests), 1)
+        # 4xx 不计入熔断
+        self.assertEqual(self.breaker.failures, 0)
+
+    async def test_deadline(self):
+        async def slow():
+            await asyncio.sleep(1)
+            return httpx.Response(200)
+
+        self.responses = [slow]
+        with self.assertRaises(UpstreamTimeout):
+            await async_http_request(URL, deadline=0.05)
+
+    async def test_breaker_opens(self):
+        self.responses = [httpx.ConnectError("refused")]
+        with self.assertRaises(UpstreamUnavailable) as context:
+            await async_http_request(URL, retries=5)
+        # 达到阈值后熔断，剩余的重试不再发出
+        self.assertIn("Circuit open", str(context.exception))
+        self.assertEqual(len(self.requests), 3)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        with self.assertRaises(UpstreamUnavailable):
+            await async_http_request(URL)
+        self.assertEqual(len(self.requests), 3)
+
+    async def test_breaker_half_open(self):
+        self.responses = [503]
+        with self.assertRaises(UpstreamBadResponse):
+            await async_http_request(URL)
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+
+        # 熔断超时后半开，只放行一个探测请求
+        self.breaker.opened_at -= self.config.breaker_reset_timeout
+        probe_sent, release = asyncio.Event(), asyncio.Event()
+
+        async def probe():
+            probe_sent.set()
+            await release.wait()
+            return httpx.Response(200)
+
+        self.responses = [probe]
+        task = asyncio.create_task(async_http_request(URL))
+        await probe_sent.wait()
+        self.assertEqual(self.breaker.state, CircuitBreaker.HALF_OPEN)
+        with self.assertRaises(UpstreamUnavailable):
+            await async_http_request(URL)
+
+        release.set()
+        self.assertEqual((await task).status_code, 200)
+        self.assertEqual(self.breaker.state, CircuitBreaker.CLOSED)
+        self.assertEqual(len(self.requests), 4)
+
+    async def test_breaker_reopens_on_failed_probe(self):
+        self.responses = [503]
+        with self.assertRaises(UpstreamBadResponse):
+            await async_http_request(URL)
+
+        self.breaker.opened_at -= self.config.breaker_reset_timeout
+        with self.assertRaises(UpstreamUnavailable):
+            await async_http_request(URL)
+        # 探测失败后重新打开，不再重试
+        self.assertEqual(self.breaker.state, CircuitBreaker.OPEN)
+        self.assertEqual(len(self.requests), 4)
@@ -0,0 +1,109 @@
+import unittest
+from unittest import mock
+
+import httpx
+import pytest
+from fastapi import FastAPI, Security
+from tortoise import connections
+
+from app.common.views import common_router
+from app.system import cache
+from app.system.models import User
+from app.system.views.auth import create_user_access_token, get_current_active_user
+from cores.revoke import token_revocation
+from tests.base import DBTestCase
+
+fakeredis = pytest.importorskip("fakeredis")
+
+app = FastAPI()
+
+
+@app.get(
+    "/",
+    dependencies=[
+        Security(get_current_active_user, scopes=["system:user:read"]),
+        Security(get_current_active_user, scopes=["system:user:update"]),
+    ],
+)
+async def endpoint(user=Security(get_current_active_user, scopes=["system:user:read"])):
+    return {"username": user.username}
+
+
+class AuthContextTest(DBTestCase):
+    """
+    一次请求中多个 scopes 不同的 Security 依赖，token 只解析一次，用户只查询一次
+    """
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        for target, attribute in (
+            (cache, "ASYNC_REDIS"),
+            (cache.user_snapshot_redis, "_redis"),
+            (cache.user_permissions_redis, "_redis"),
+            (cache.permission_version_redis, "_redis"),
+            (token_revocation.auth_redis, "redis"),
+        ):
+            patcher = mock.patch.object(target, attribute, redis)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # 用户快照缓存始终未命中，每次解析 token 都会查询数据库
+        for target in (cache.user_snapshot_local, cache.user_snapshot_redis):
+            patcher = mock.patch.object(target, "get", return_value=None)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        cache.permission_version_local.clear()
+
+        self.user = await User.create(
+            username="alice", email="alice@example.com", hashed_password="x"
+        )
+        token = await create_user_access_token(
+            self.user.id, self.user.username, ["system:user:read", "system:user:update"]
+        )
+        self.client = httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=app),
+            base_url="http://test",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+
+        # 统计查询用户表的 SQL
+        self.user_queries = []
+        conn = connections.get("default")
+        execute_query = conn.execute_query
+
+        async def counting_execute_query(sql, values=None):
+            if User._meta.db_table in sql:
+                self.user_queries.append(sql)
+            return await execute_query(sql, values)
+
+        patcher = mock.patch.object(conn, "execute_query", counting_execute_query)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def asyncTearDown(self):
+        await self.client.aclose()
+        await super().asyncTearDown()
+
+    async def test_one_user_query_per_request(self):
+        response = await self.client.get("/")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {"username": "alice"})
+        self.assertEqual(len(self.user_queries), 1, self.user_queries)
+
+    async def test_missing_scope(self):
+        token = await create_user_access_token(
+            self.user.id, self.user.username, ["system:user:read"]
+        )
+        response = await self.client.get("/", headers={"Authorization": f"Bearer {token}"})
+        self.assertEqual(response.status_code, 401)
+        self.assertEqual(len(self.user_queries), 1, self.user_queries)
+
+
+class MetricsAuthTest(unittest.IsolatedAsyncioTestCase):
+    async def test_metrics_requires_token(self):
+        metrics_app = FastAPI()
+        metrics_app.include_router(common_router, prefix="/common")
+        transport = httpx.ASGITransport(app=metrics_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/common/metrics")
+        self.assertEqual(response.status_code, 401)
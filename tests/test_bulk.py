@@ -0,0 +1,50 @@
+from fastapi import HTTPException
+
+from app.system.models import Menu, Permission
+from app.system.serializers.menus import MenuBulkPatch
+from app.system.serializers.permission import PermissionBulkPatch
+from app.system.serializers.roles import RoleBulkPatch
+from app.system.serializers.users import UserBulkPatch
+from cores.bulk import bulk_update
+from tests.base import DBTestCase
+
+
+class BulkPatchTest(DBTestCase):
+    def test_items_accept_partial_fields(self):
+        for schema, values in (
+            (UserBulkPatch, {"is_active": False}),
+            (RoleBulkPatch, {"description": "d"}),
+            (PermissionBulkPatch, {"name": "p:1"}),
+            (MenuBulkPatch, {"meta_order": 2}),
+        ):
+            with self.subTest(schema=schema.__name__):
+                item = schema(id=1, **values)
+                self.assertEqual(item.model_dump(exclude_unset=True), {"id": 1, **values})
+
+    async def test_partial_update_keeps_other_fields(self):
+        permission = await Permission.create(name="p:1", description="old")
+        menu = await Menu.create(name="m", path="/m", components="c", meta_order=1)
+
+        item = PermissionBulkPatch(id=permission.id, description="new")
+        await bulk_update(
+            Permission, [(item.id, item.model_dump(exclude_unset=True, exclude={"id"}))]
+        )
+        item = MenuBulkPatch(id=menu.id, meta_order=2)
+        await bulk_update(Menu, [(item.id, item.model_dump(exclude_unset=True, exclude={"id"}))])
+
+        await permission.refresh_from_db()
+        await menu.refresh_from_db()
+        self.assertEqual((permission.name, permission.description), ("p:1", "new"))
+        self.assertEqual((menu.path, menu.meta_order), ("/m", 2))
+
+    async def test_null_for_required_field_is_rejected(self):
+        permission = await Permission.create(name="p:1", description="old")
+        item = PermissionBulkPatch(id=permission.id, name=None, description=None)
+        with self.assertRaises(HTTPException) as ctx:
+            await bulk_update(
+                Permission, [(item.id, item.model_dump(exclude_unset=True, exclude={"id"}))]
+            )
+        self.assertEqual(ctx.exception.status_code, 422)
+        self.assertEqual(
+            ctx.exception.detail, [{"index": 0, "field": "name", "msg": "name may not be null"}]
+        )
@@ -0,0 +1,34 @@
+import configparser
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from cores.config import read_config
+
+EXAMPLE = Path(__file__).resolve().parent.parent / "config.ini.example"
+
+
+class ArchiveConfigTest(unittest.TestCase):
+    def read(self, parser: configparser.ConfigParser):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "config.ini")
+            with open(path, "w") as f:
+                parser.write(f)
+            with mock.patch.dict(os.environ, {"CONFIG_FILE_PATH": path}):
+                return read_config()
+
+    def test_disabled_by_default(self):
+        parser = configparser.ConfigParser()
+        parser.read(EXAMPLE)
+        self.assertFalse(self.read(parser).archive.enabled)
+
+        parser.remove_section("archive")
+        self.assertFalse(self.read(parser).archive.enabled)
+
+    def test_enabled(self):
+        parser = configparser.ConfigParser()
+        parser.read(EXAMPLE)
+        parser.set("archive", "enabled", "true")
+        self.assertTrue(self.read(parser).archive.enabled)
@@ -0,0 +1,36 @@
+from app.system.models import Permission, Role
+from cores import db_router
+from cores.bulk import bulk_create, bulk_soft_delete, bulk_update
+from cores.m2m import sync_m2m
+from tests.base import DBTestCase
+
+
+class PinToPrimaryTest(DBTestCase):
+    """
+    直接在主库事务中写入的辅助函数，之后的读也必须走主库
+    """
+
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        self.role = await Role.create(name="admin")
+        self.permissions = [await Permission.create(name=f"p:{i}") for i in range(3)]
+        db_router._pinned_to_primary.set(False)
+
+    def assertPinned(self):
+        self.assertTrue(db_router._pinned_to_primary.get())
+
+    async def test_sync_m2m(self):
+        await sync_m2m(self.role.permissions, [p.id for p in self.permissions])
+        self.assertPinned()
+
+    async def test_bulk_create(self):
+        await bulk_create(Permission, [{"name": "new"}])
+        self.assertPinned()
+
+    async def test_bulk_update(self):
+        await bulk_update(Permission, [(self.permissions[0].id, {"description": "x"})])
+        self.assertPinned()
+
+    async def test_bulk_soft_delete(self):
+        await bulk_soft_delete(Permission, [self.permissions[0].id])
+        self.assertPinned()
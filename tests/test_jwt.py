@@ -0,0 +1,36 @@
+import os
+import time
+import unittest
+from datetime import timedelta
+
+from jose import jwt
+
+from cores.jwt import create_access_token, verify_token
+
+
+class AccessTokenTest(unittest.TestCase):
+    def setUp(self):
+        # 与 Dockerfile 相同的非 UTC 时区，iat/exp 不应受本地时区影响
+        self._tz = os.environ.get("TZ")
+        os.environ["TZ"] = "Asia/Shanghai"
+        time.tzset()
+
+    def tearDown(self):
+        if self._tz is None:
+            os.environ.pop("TZ", None)
+        else:
+            os.environ["TZ"] = self._tz
+        time.tzset()
+
+    def test_iat_and_exp_are_unix_timestamps(self):
+        before = int(time.time())
+        token = create_access_token({"sub": "admin"}, expires_delta=timedelta(hours=1))
+        payload = jwt.get_unverified_claims(token)
+        self.assertGreaterEqual(payload["iat"], before)
+        self.assertLessEqual(payload["iat"], int(time.time()))
+        self.assertEqual(payload["exp"] - payload["iat"], 3600)
+
+    def test_new_token_is_valid(self):
+        token = create_access_token({"sub": "admin"})
+        payload = verify_token(token)
+        self.assertEqual(payload["sub"], "admin")
@@ -0,0 +1,97 @@
+import base64
+import json
+import unittest
+
+from fastapi import HTTPException
+
+from app.system.models import Permission, User
+from app.system.serializers.permission import PermissionDetail
+from app.system.serializers.users import UserDetail
+from cores.paginate import (
+    OrderType,
+    PaginationMode,
+    PaginationParams,
+    _decode_cursor,
+    _encode_cursor,
+    from_queryset,
+    paginate_by_cursor,
+)
+from tests.base import DBTestCase
+
+KEYS = ["created_at", "id"]
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+class DecodeCursorTest(unittest.TestCase):
+    def test_round_trip(self):
+        cursor = _encode_cursor(KEYS, False, ["2026-01-01T00:00:00+00:00", 1])
+        self.assertEqual(_decode_cursor(cursor, KEYS), (False, ["2026-01-01T00:00:00+00:00", 1]))
+
+    def test_invalid_cursor(self):
+        cursors = {
+            "not base64": "!!!",
+            "not json": _cursor("x")[:-2] + "{",
+            "not an object": _cursor([1, 2]),
+            "missing values": _cursor({"k": KEYS, "f": True}),
+            "values not a list": _cursor({"k": KEYS, "f": True, "v": 1}),
+            "values is a string": _cursor({"k": KEYS, "f": True, "v": "ab"}),
+            "forward not a bool": _cursor({"k": KEYS, "f": "yes", "v": ["x", 1]}),
+            "null value": _cursor({"k": KEYS, "f": True, "v": [None, 1]}),
+            "nested value": _cursor({"k": KEYS, "f": True, "v": [{"a": 1}, 1]}),
+            "other keys": _cursor({"k": ["id"], "f": True, "v": ["x", 1]}),
+        }
+        for name, cursor in cursors.items():
+            with self.subTest(name), self.assertRaises(HTTPException) as context:
+                _decode_cursor(cursor, KEYS)
+            self.assertEqual(context.exception.status_code, 400)
+
+
+class PaginateByCursorTest(DBTestCase):
+    async def asyncSetUp(self):
+        await super().asyncSetUp()
+        for i in range(3):
+            await User.create(
+                username=f"user{i}", email=f"user{i}@example.com", hashed_password="x"
+            )
+
+    def _params(self, cursor=None) -> PaginationParams:
+        return PaginationParams(
+            page=1,
+            limit=2,
+            sort_by=["created_at"],
+            sort_order=[OrderType.DESC],
+            mode=PaginationMode.CURSOR,
+            cursor=cursor,
+            with_total=False,
+            approximate_total=False,
+        )
+
+    async def test_next_page(self):
+        first = await paginate_by_cursor(User.all(), self._params(), UserDetail)
+        second = await paginate_by_cursor(User.all(), self._params(first.next_cursor), UserDetail)
+        usernames = [user.username for user in first.list + second.list]
+        self.assertEqual(sorted(usernames), ["user0", "user1", "user2"])
+
+    async def test_invalid_value(self):
+        for values in (["not a date", 1], ["2026-01-01", "x"]):
+            cursor = _cursor({"k": KEYS, "f": True, "v": values})
+            with self.subTest(values=values), self.assertRaises(HTTPException) as context:
+                await paginate_by_cursor(User.all(), self._params(cursor), UserDetail)
+            self.assertEqual(context.exception.status_code, 400)
+
+
+class FromQuerysetTest(DBTestCase):
+    async def test_same_as_schema_from_queryset(self):
+        await Permission.bulk_create(
+            [Permission(name=f"perm:{i}", description=f"permission {i}") for i in range(20)]
+        )
+        queryset = Permission.get_queryset().order_by("id")
+        expected = await PermissionDetail.from_queryset(queryset)
+        actual = await from_queryset(PermissionDetail, queryset)
+        self.assertEqual(
+            [item.model_dump_json() for item in actual],
+            [item.model_dump_json() for item in expected],
+        )
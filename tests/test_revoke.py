@@ -0,0 +1,58 @@
+import time
+import unittest
+
+import pytest
+
+from cores.redis_proxy import AuthRedis
+from cores.revoke import TokenRevocation
+
+fakeredis = pytest.importorskip("fakeredis")
+
+
+class CountingRedis(fakeredis.FakeAsyncRedis):
+    """
+    记录不经过 pipeline 直接发送的命令
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.commands = []
+
+    async def execute_command(self, *args, **options):
+        self.commands.append(args[0])
+        return await super().execute_command(*args, **options)
+
+
+class RevokeUsersTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.redis = CountingRedis(decode_responses=True)
+        self.revocation = TokenRevocation(AuthRedis(self.redis), capacity=1000)
+        self.pubsub = self.redis.pubsub()
+        await self.pubsub.subscribe(AuthRedis.REVOKED_CHANNEL)
+        await self.pubsub.get_message(timeout=1)
+        self.redis.commands.clear()
+
+    async def asyncTearDown(self):
+        await self.pubsub.aclose()
+        await self.redis.aclose()
+
+    async def test_revoke_users_in_one_pipeline(self):
+        usernames = [f"user{i}" for i in range(50)]
+        # 吊销之前签发的 token
+        iat = int(time.time())
+        await self.revocation.revoke_users(*usernames)
+        # 所有写入和通知都在 pipeline 中
+        self.assertEqual(self.redis.commands, [])
+
+        messages = []
+        while message := await self.pubsub.get_message(ignore_subscribe_messages=True, timeout=1):
+            messages.append(message["data"])
+        self.assertEqual(messages, [f"user:{username}" for username in usernames])
+
+        for username in usernames:
+            self.assertTrue(await self.revocation.is_revoked({"sub": username, "iat": iat}))
+        self.assertFalse(await self.revocation.is_revoked({"sub": "other", "iat": iat}))
+
+    async def test_revoke_no_users(self):
+        await self.revocation.revoke_users()
+        self.assertEqual(self.redis.commands, [])